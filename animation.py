@@ -0,0 +1,313 @@
+"""
+This script defines the animation of the characters.
+
+The clips of each character (idle, walk, jump, fall) are described by data:
+the images of their frames, each loaded once as a pair of textures facing
+right and left, and how the clip advances: by the distance walked, by time,
+or not at all. Each list of animated sprites gets a SpriteAnimator that
+keeps the animation state in the columns of an EntityStore and advances
+every sprite in one pass after the physics step, from how far each one
+moved. A texture is only assigned to a sprite when the frame it shows
+actually changes.
+
+Developers: DemonCyborg, Taterstew, pillitoka, ballipilla
+"""
+
+import os
+
+import numpy as np
+
+import asset_registry
+from entity_store import EntityStore
+
+# Constants used to track if a character is facing left or right, the index in a texture pair
+RIGHT_FACING = 0
+LEFT_FACING = 1
+
+# --- Clips of an animation, by index
+IDLE = 0
+WALK = 1
+JUMP = 2
+FALL = 3
+CLIP_NAMES = ("idle", "walk", "jump", "fall")
+
+# Animations of the characters.
+# Each clip is (file names of the frames, pixels walked per frame, seconds per frame):
+# a clip advances with the distance walked, or with time, or has a single frame.
+#   dead_zone: close enough to not-moving to have the animation go to idle
+#   faces_motion: the character turns to where it moves, otherwise its direction is given
+#   idle_when_still: the idle clip is shown when the character stops
+#   restart_walk_in_air: the walk starts over from its first frame after a jump
+CHARACTERS = {
+    "cop": {
+        "folder": "resources/images/cop",
+        "clips": {
+            "idle": (["cop_idle.png"], None, None),
+            "walk": ([f"cop_{i}.png" for i in range(10)], 20, None),
+            "jump": (["cop_idle.png"], None, None),
+            "fall": (["cop_idle.png"], None, None),
+        },
+        "dead_zone": 0,
+        "faces_motion": True,
+        "idle_when_still": True,
+        "restart_walk_in_air": True,
+    },
+    "racoon_boss": {
+        "folder": "resources/images/racoon_boss",
+        "clips": {
+            "idle": (["racoonr_idle.png"], None, None),
+            "walk": ([f"racoonr_{i}.png" for i in range(8)], 20, None),
+            "jump": (["racoonr_idle.png"], None, None),
+            "fall": (["racoonr_idle.png"], None, None),
+        },
+        "dead_zone": 0.05,
+        "faces_motion": True,
+        "idle_when_still": True,
+        "restart_walk_in_air": False,
+    },
+    "racoon": {
+        "folder": "resources/images/racoon",
+        "clips": {
+            "idle": (["racoon_0.png"], None, None),
+            "walk": ([f"racoon_{i}.png" for i in range(4)], 25, None),
+        },
+        "dead_zone": 0,
+        "faces_motion": False,
+        "idle_when_still": False,
+        "restart_walk_in_air": False,
+    },
+}
+
+# Columns of the animation state of a sprite, for an EntityStore
+ANIMATION_FIELDS = {
+    # Where the sprite was after the previous step
+    "last_x": (float, 0.0),
+    "last_y": (float, 0.0),
+    # How far the sprite traveled horizontally since changing the walking texture
+    "x_odometer": (float, 0.0),
+    # Index of the current walking texture
+    "cur_texture": (np.int32, 0),
+    "facing": (np.int8, RIGHT_FACING),
+    # Clip shown, and for how long
+    "clip": (np.int8, IDLE),
+    "clip_time": (float, 0.0),
+    # Code of the texture the sprite shows, from its clip, frame and direction
+    "shown": (np.int32, -1),
+}
+
+# Characters already loaded, by name
+_characters = {}
+
+
+class Clip:
+    """Frames of an animation, as (right facing, left facing) texture pairs."""
+
+    def __init__(self, frames, distance=None, duration=None):
+        """Initialize the class.
+
+        :param frames: texture pairs of the frames
+        :type frames: tuple
+        :param distance: pixels walked before showing the next frame, None if it does not advance by distance
+        :type distance: float
+        :param duration: seconds before showing the next frame, None if it does not advance by time
+        :type duration: float
+        """
+        self.frames = frames
+        self.distance = distance
+        self.duration = duration
+
+    @property
+    def is_timed(self):
+        """True if the clip advances with time."""
+        return self.duration is not None and len(self.frames) > 1
+
+
+class Character:
+    """Clips and rules of the animation of a character."""
+
+    def __init__(self, definition):
+        """Initialize the class and load the textures of its clips.
+
+        :param definition: a value of CHARACTERS
+        :type definition: dict
+        """
+        folder = definition["folder"]
+        clips = {}
+        for name, (file_names, distance, duration) in definition["clips"].items():
+            frames = tuple(asset_registry.load_texture_pair(os.path.join(folder, file_name))
+                           for file_name in file_names)
+            clips[name] = Clip(frames, distance, duration)
+        # clip of each index, None when the character does not have it
+        self.clips = [clips.get(name) for name in CLIP_NAMES]
+        self.frame_count = max(len(clip.frames) for clip in clips.values())
+
+        self.dead_zone = definition["dead_zone"]
+        self.faces_motion = definition["faces_motion"]
+        self.idle_when_still = definition["idle_when_still"]
+        self.restart_walk_in_air = definition["restart_walk_in_air"]
+
+    @property
+    def idle_texture(self):
+        """Texture of a character standing still, facing right."""
+        return self.clips[IDLE].frames[0][RIGHT_FACING]
+
+
+def load_character(name):
+    """Return the animation of a character, loading it the first time.
+
+    :param name: name of the character, a key of CHARACTERS
+    :type name: str
+    :rtype: Character
+    """
+    character = _characters.get(name)
+    if character is None:
+        character = Character(CHARACTERS[name])
+        _characters[name] = character
+    return character
+
+
+class SpriteAnimator:
+    """Animates the sprites of a list, all of the same character."""
+
+    def __init__(self, sprites, character_name):
+        """Initialize the class.
+
+        :param sprites: the sprites to animate
+        :type sprites: arcade.SpriteList
+        :param character_name: name of their character, a key of CHARACTERS
+        :type character_name: str
+        """
+        self.character = load_character(character_name)
+        self.store = EntityStore(sprites, ANIMATION_FIELDS)
+        self.reset()
+
+    def reset(self):
+        """Start over from where the sprites are, standing still and facing right."""
+        store = self.store
+        if not len(store):
+            return
+        rows = np.arange(len(store))
+        store["last_x"][:], store["last_y"][:] = store.positions(rows)
+        for name in ("x_odometer", "cur_texture", "clip_time"):
+            store[name][:] = 0
+        store["facing"][:] = RIGHT_FACING
+        store["clip"][:] = IDLE
+        store["shown"][:] = -1
+        self._show(rows, np.zeros(len(rows), dtype=np.int32))
+
+    def _show(self, rows, frames):
+        """Give sprites the texture of their clip, frame and direction, if they do not show it already."""
+        store = self.store
+        clip = store["clip"][rows].astype(np.int32)
+        facing = store["facing"][rows]
+        code = (clip * self.character.frame_count + frames) * 2 + facing
+        changed = code != store["shown"][rows]
+        if not changed.any():
+            return
+        store["shown"][rows[changed]] = code[changed]
+        sprites = store.sprites
+        clips = self.character.clips
+        for index, clip_index, frame, direction in zip(rows[changed].tolist(), clip[changed].tolist(),
+                                                       frames[changed].tolist(), facing[changed].tolist()):
+            sprites[index].texture = clips[clip_index].frames[frame][direction]
+
+    def update(self, delta_time, indices=None, contacts=None, facing_right=None):
+        """Advance the animation of the sprites by how far they moved in the last step.
+
+        :param delta_time: Time interval since the last update in seconds.
+        :type delta_time: float
+        :param indices: rows of the sprites to animate, every sprite if None
+        :type indices: list
+        :param contacts: contacts of the bodies, for the jump and fall clips
+        :type contacts: ContactCache
+        :param facing_right: for characters that do not face where they move, the direction of each sprite
+        :type facing_right: numpy.ndarray
+        """
+        store = self.store
+        character = self.character
+        clips = character.clips
+        dead_zone = character.dead_zone
+        if indices is None:
+            rows = np.arange(len(store))
+        else:
+            rows = np.asarray(indices, dtype=np.intp)
+        if not len(rows):
+            return
+
+        # how far each sprite moved in the step
+        x, y = store.positions(rows)
+        dx = x - store["last_x"][rows]
+        dy = y - store["last_y"][rows]
+        store["last_x"][rows] = x
+        store["last_y"][rows] = y
+
+        # Figure out if we need to face left or right
+        facing = store["facing"][rows]
+        if facing_right is not None:
+            facing = np.where(facing_right[rows], RIGHT_FACING, LEFT_FACING).astype(np.int8)
+        elif character.faces_motion:
+            facing = np.where(dx < -dead_zone, LEFT_FACING,
+                              np.where(dx > dead_zone, RIGHT_FACING, facing)).astype(np.int8)
+        store["facing"][rows] = facing
+
+        # Add to the odometer how far we've moved
+        odometer = store["x_odometer"][rows] + dx
+        cur_texture = store["cur_texture"][rows]
+        previous_clip = store["clip"][rows]
+        clip = previous_clip.copy()
+
+        # Jumping animation
+        jumping = np.zeros(len(rows), dtype=bool)
+        falling = np.zeros(len(rows), dtype=bool)
+        if contacts is not None and clips[JUMP] is not None:
+            sprites = store.sprites
+            in_air = np.fromiter((not contacts.is_on_ground(sprites[index]) for index in rows.tolist()),
+                                 dtype=bool, count=len(rows))
+            if character.restart_walk_in_air:
+                cur_texture[in_air] = 0
+            jumping = in_air & (dy > dead_zone)
+            falling = in_air & (dy < -dead_zone)
+            clip[jumping] = JUMP
+            clip[falling] = FALL
+        on_feet = ~(jumping | falling)
+
+        # Idle animation
+        still = np.zeros(len(rows), dtype=bool)
+        if character.idle_when_still:
+            still = on_feet & (np.abs(dx) <= dead_zone)
+            clip[still] = IDLE
+        walking = on_feet & ~still
+
+        # Have we moved far enough to change the texture?
+        walk = clips[WALK]
+        if walk.distance is not None:
+            advancing = walking & (np.abs(odometer) > walk.distance)
+            odometer[advancing] = 0
+            cur_texture[advancing] = (cur_texture[advancing] + 1) % len(walk.frames)
+            clip[advancing] = WALK
+        else:
+            advancing = walking
+            clip[walking] = WALK
+        store["x_odometer"][rows] = odometer
+        store["cur_texture"][rows] = cur_texture
+
+        clip_time = np.where(clip == previous_clip, store["clip_time"][rows] + delta_time, 0)
+        store["clip"][rows] = clip
+        store["clip_time"][rows] = clip_time
+
+        # frame shown by each sprite, clips advancing with time run on their own
+        frames = np.zeros(len(rows), dtype=np.int32)
+        is_timed = np.zeros(len(rows), dtype=bool)
+        for clip_index, clip_data in enumerate(clips):
+            if clip_data is None or len(clip_data.frames) == 1:
+                continue
+            in_clip = clip == clip_index
+            if clip_data.is_timed:
+                frames[in_clip] = (clip_time[in_clip] // clip_data.duration).astype(np.int32) % len(clip_data.frames)
+                is_timed |= in_clip
+            else:
+                frames[in_clip] = cur_texture[in_clip] % len(clip_data.frames)
+
+        # only the sprites whose animation moved on can change texture
+        updating = jumping | falling | still | advancing | is_timed
+        self._show(rows[updating], frames[updating])
@@ -0,0 +1,122 @@
+"""
+This script defines the shared registry for textures and hit boxes.
+
+Every image is decoded once per process and the same texture objects are
+handed out to every sprite instance, so level load time does not grow with
+the number of enemies and restarting the game does not decode anything again.
+
+Developers: DemonCyborg, Taterstew, pillitoka, ballipilla
+"""
+
+import os
+import arcade
+
+# Character frames, grouped by their resource folder.
+# Every image listed here is decoded (both facing directions) by preload().
+CHARACTER_IMAGES = {
+    "resources/images/cop": ["cop_idle.png", "cop_collision.png"] + [f"cop_{i}.png" for i in range(10)],
+    "resources/images/owl": ["owl_idle.png", "owl_fly.png"],
+    "resources/images/cat": ["cat_idle.png", "bubblegum.png"],
+    "resources/images/racoon": [f"racoon_{i}.png" for i in range(4)],
+    "resources/images/racoon_boss": ["racoonr_idle.png", "racoon_collision.png"] + [f"racoonr_{i}.png" for i in range(8)],
+}
+
+# Cache of decoded textures, keyed by (file name, flipped horizontally)
+_texture_cache = {}
+
+# Cache of texture pairs and walk cycles, shared by all sprite instances
+_texture_pair_cache = {}
+_frames_cache = {}
+
+# Cache of hit box points, keyed by file name
+_hit_box_cache = {}
+
+
+def load_texture(file_name, flipped_horizontally=False):
+    """Return the texture for an image, decoding it only the first time.
+
+    :param file_name: path of the image
+    :type file_name: str
+    :param flipped_horizontally: mirror the image along the vertical axis
+    :type flipped_horizontally: bool
+    :return: the shared texture
+    :rtype: arcade.Texture
+    """
+    key = (file_name, flipped_horizontally)
+    texture = _texture_cache.get(key)
+    if texture is None:
+        texture = arcade.load_texture(file_name, flipped_horizontally=flipped_horizontally)
+        _texture_cache[key] = texture
+    return texture
+
+
+def load_texture_pair(file_name):
+    """Return the (right facing, left facing) textures for an image.
+
+    :param file_name: path of the image
+    :type file_name: str
+    :return: the shared texture pair
+    :rtype: tuple
+    """
+    pair = _texture_pair_cache.get(file_name)
+    if pair is None:
+        pair = (load_texture(file_name), load_texture(file_name, flipped_horizontally=True))
+        _texture_pair_cache[file_name] = pair
+    return pair
+
+
+def load_frames(resource_path, prefix, num_frames):
+    """Return the texture pairs of an animation stored as numbered images.
+
+    The frames are expected to be named <prefix><index>.png
+
+    :param resource_path: folder containing the frames
+    :type resource_path: str
+    :param prefix: file name prefix of the frames
+    :type prefix: str
+    :param num_frames: number of frames in the animation
+    :type num_frames: int
+    :return: the shared tuple of texture pairs
+    :rtype: tuple
+    """
+    key = (resource_path, prefix, num_frames)
+    frames = _frames_cache.get(key)
+    if frames is None:
+        frames = tuple(load_texture_pair(os.path.join(resource_path, f"{prefix}{i}.png"))
+                       for i in range(num_frames))
+        _frames_cache[key] = frames
+    return frames
+
+
+def load_hit_box(file_name):
+    """Return the hit box points computed from the shape of an image.
+
+    This is used both for regular frames and for the *_collision.png shapes.
+
+    :param file_name: path of the image
+    :type file_name: str
+    :return: the shared hit box points
+    :rtype: tuple
+    """
+    hit_box = _hit_box_cache.get(file_name)
+    if hit_box is None:
+        hit_box = tuple(tuple(point) for point in load_texture(file_name).hit_box_points)
+        _hit_box_cache[file_name] = hit_box
+    return hit_box
+
+
+def preload():
+    """Decode every character image and compute its hit box up front."""
+    for resource_path, file_names in CHARACTER_IMAGES.items():
+        for file_name in file_names:
+            full_name = os.path.join(resource_path, file_name)
+            load_texture_pair(full_name)
+            load_hit_box(full_name)
+
+
+def clear():
+    """Forget every cached texture and hit box."""
+    _texture_cache.clear()
+    _texture_pair_cache.clear()
+    _frames_cache.clear()
+    _hit_box_cache.clear()
@@ -0,0 +1,141 @@
+"""
+This script defines the pre-rendered background of the level.
+
+The decorative layers never change, so at level load their tiles are
+composed on the CPU, with PIL, into one image per chunk of the level.
+Each frame only the two or three chunks in the viewport are drawn, one quad
+each, instead of every tile of every layer. Composing on the CPU works the
+same with any OpenGL driver, including software ones.
+
+Layers can scroll slower than the level to give a feeling of depth: a layer
+with a parallax factor of 0.5 moves half as fast as the camera. Consecutive
+layers with the same factor are baked into the same images.
+
+Developers: DemonCyborg, Taterstew, pillitoka, ballipilla
+"""
+
+import math
+import hashlib
+
+import arcade
+from PIL import Image
+
+# Width of the image of a chunk, in pixels
+CHUNK_WIDTH = 1024
+
+
+def _paste(image, tile_image, x, y):
+    """Alpha-blend a tile into an image, cropping what is outside of it.
+
+    :param image: image to paste into
+    :type image: PIL.Image.Image
+    :param tile_image: tile to paste
+    :type tile_image: PIL.Image.Image
+    :param x: left of the tile in the image
+    :type x: int
+    :param y: top of the tile in the image
+    :type y: int
+    """
+    left = max(0, -x)
+    top = max(0, -y)
+    right = min(tile_image.width, image.width - x)
+    bottom = min(tile_image.height, image.height - y)
+    if left >= right or top >= bottom:
+        return
+    image.alpha_composite(tile_image, dest=(x + left, y + top), source=(left, top, right, bottom))
+
+
+class BakedLayer:
+    """Layers of sprites composed into one image per chunk, drawn with a parallax factor."""
+
+    def __init__(self, sprite_lists, parallax=1.0, chunk_width=CHUNK_WIDTH):
+        """Initialize the class and compose the images of the chunks.
+
+        :param sprite_lists: sprite lists composed into the images, back to front
+        :type sprite_lists: list
+        :param parallax: how fast the layer scrolls compared with the camera
+        :type parallax: float
+        :param chunk_width: width of a chunk in pixels
+        :type chunk_width: int
+        """
+        self.parallax = parallax
+        self.chunk_width = chunk_width
+        # chunk index -> texture
+        self.chunks = {}
+
+        sprites = [sprite for sprite_list in sprite_lists for sprite in sprite_list]
+        if not sprites:
+            self.bottom = self.height = 0
+            return
+        self.bottom = math.floor(min(sprite.bottom for sprite in sprites))
+        self.height = math.ceil(max(sprite.top for sprite in sprites)) - self.bottom
+
+        # tiles of each chunk, in drawing order, as (texture, width, height, left, top) in the chunk
+        chunk_tiles = {}
+        for sprite in sprites:
+            first = math.floor(sprite.left / chunk_width)
+            last = math.floor((sprite.right - 1) / chunk_width)
+            for index in range(first, last + 1):
+                chunk_tiles.setdefault(index, []).append(
+                    (sprite.texture, round(sprite.width), round(sprite.height),
+                     round(sprite.left) - index * chunk_width, self.bottom + self.height - round(sprite.top)))
+
+        # chunks with the same tiles at the same places share their texture
+        textures = {}
+        for index, tiles in chunk_tiles.items():
+            signature = tuple((texture.name, width, height, left, top) for texture, width, height, left, top in tiles)
+            texture = textures.get(signature)
+            if texture is None:
+                texture = self._bake(tiles, signature)
+                textures[signature] = texture
+            self.chunks[index] = texture
+
+    def _bake(self, tiles, signature):
+        """Compose the image of a chunk.
+
+        :param tiles: (texture, width, height, left, top) of each tile of the chunk
+        :type tiles: list
+        :param signature: what the chunk contains, used to name the texture
+        :type signature: tuple
+        :return: the texture of the chunk
+        :rtype: arcade.Texture
+        """
+        image = Image.new("RGBA", (self.chunk_width, self.height), (0, 0, 0, 0))
+        for texture, width, height, left, top in tiles:
+            tile_image = texture.image.convert("RGBA")
+            if tile_image.size != (width, height):
+                tile_image = tile_image.resize((width, height))
+            _paste(image, tile_image, left, top)
+        key = repr((self.chunk_width, self.height, signature))
+        name = "baked_" + hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return arcade.Texture(name, image, hit_box_algorithm="None")
+
+    def uploads(self, target):
+        """Draw each image once, which uploads it to the GPU, yielding after each one.
+
+        :param target: offscreen target drawn into, like a light layer
+        """
+        for texture in dict.fromkeys(self.chunks.values()):
+            with target:
+                texture.draw_sized(self.chunk_width / 2, self.bottom + self.height / 2,
+                                   self.chunk_width, self.height)
+            yield
+
+    def draw(self, left, right):
+        """Draw the chunks in the viewport.
+
+        :param left: left of the viewport
+        :type left: float
+        :param right: right of the viewport
+        :type right: float
+        """
+        # the layer is shifted along with the camera, so it scrolls slower
+        offset = left * (1 - self.parallax)
+        first = math.floor((left - offset) / self.chunk_width)
+        last = math.floor((right - offset) / self.chunk_width)
+        center_y = self.bottom + self.height / 2
+        for index in range(first, last + 1):
+            texture = self.chunks.get(index)
+            if texture is not None:
+                texture.draw_sized(offset + (index + 0.5) * self.chunk_width, center_y,
+                                   self.chunk_width, self.height)
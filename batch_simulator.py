@@ -0,0 +1,294 @@
+"""
+This script runs many headless games in parallel, to tune the constants of the game.
+
+Each run plays one game with a set of parameters and a policy. Parameters
+override module constants, like simulation.GAME_LENGTH or
+racoon_sprite.MAX_DELTA_X, for that run only. The policy is a bot or a
+recording whose inputs are played back. Runs are spread over a pool of
+processes, one per core, and their outcomes are reported as they finish,
+then summed up in a table with one row per set of parameters.
+
+The game has no randomness, so a run with the same parameters and policy
+always ends the same way.
+
+Usage: python batch_simulator.py [--set module.NAME=value,value ...] [--policy run_right|idle|FILE]
+                                 [--runs N] [--workers N] [--seconds S] [--csv FILE]
+
+Developers: DemonCyborg, Taterstew, pillitoka, ballipilla
+"""
+
+import os
+import csv
+import random
+import argparse
+import itertools
+import importlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import sound_bank
+from frame_profiler import profiler
+from replay import Recording, ReplayDriver
+from simulation import GameSimulation, MAP_NAME, PHYSICS_TIMESTEP, WIN, run_right_policy
+
+# Bots that can play a run. A policy that is not one of them is the path of a recording.
+POLICIES = {
+    "run_right": run_right_policy,
+    "idle": None,
+}
+
+# A run is stopped this long after the game should have ended, when no time is given
+RUN_TIME_MARGIN = 5
+
+# Simulation of the worker process, kept between runs that have the same parameters
+_worker_simulation = None
+_worker_key = None
+
+
+def parse_value(text):
+    """Return a parameter value read from the command line, as a number when it is one.
+
+    :param text: value as typed
+    :type text: str
+    """
+    for kind in (int, float):
+        try:
+            return kind(text)
+        except ValueError:
+            pass
+    return text
+
+
+def parameter_grid(settings):
+    """Return every combination of parameter values.
+
+    :param settings: list of "module.NAME=value,value" strings
+    :type settings: list
+    :return: list of parameter sets, dictionaries of "module.NAME" -> value
+    :rtype: list
+    """
+    names = []
+    values = []
+    for setting in settings:
+        name, _, text = setting.partition("=")
+        if not text:
+            raise ValueError(f"{setting} is not module.NAME=value,value")
+        names.append(name)
+        values.append([parse_value(value) for value in text.split(",")])
+    return [dict(zip(names, combination)) for combination in itertools.product(*values)]
+
+
+def apply_parameters(parameters):
+    """Override module constants.
+
+    :param parameters: "module.NAME" -> value
+    :type parameters: dict
+    :return: the values that were overridden, to restore them
+    :rtype: dict
+    """
+    previous = {}
+    for name, value in parameters.items():
+        module_name, _, constant = name.rpartition(".")
+        module = importlib.import_module(module_name)
+        if not hasattr(module, constant):
+            raise ValueError(f"{name} is not a constant of the game")
+        previous[name] = getattr(module, constant)
+        setattr(module, constant, value)
+    return previous
+
+
+def _init_worker():
+    """Set a worker process up."""
+    sound_bank.set_muted(True)
+    profiler.enable_counters()
+
+
+def _worker_setup(map_name, parameters):
+    """Return the simulation of the worker process, set up for a set of parameters.
+
+    Setting up is the slowest part of a run, so the simulation is only reset
+    when the parameters are the same as for the previous run.
+    """
+    global _worker_simulation, _worker_key
+    from run_game import SCREEN_WIDTH, SCREEN_HEIGHT, SPRITE_SIZE
+
+    key = (map_name, tuple(sorted(parameters.items())))
+    if key == _worker_key:
+        _worker_simulation.reset()
+    else:
+        _worker_simulation = GameSimulation(SCREEN_WIDTH, SCREEN_HEIGHT, SPRITE_SIZE)
+        _worker_simulation.setup(map_name)
+        _worker_key = key
+    return _worker_simulation
+
+
+def run_one(task):
+    """Play one game. Runs in a worker process.
+
+    :param task: run id, parameters, policy, seed, map name and maximum simulated seconds (None for a bit after GAME_LENGTH)
+    :type task: tuple
+    :return: the outcome of the run
+    :rtype: dict
+    """
+    run_id, parameters, policy, seed, map_name, seconds = task
+    previous = apply_parameters(parameters)
+    try:
+        random.seed(seed)
+        simulation = _worker_setup(map_name, parameters)
+        profiler.counters.clear()
+        if seconds is None:
+            seconds = importlib.import_module("simulation").GAME_LENGTH + RUN_TIME_MARGIN
+
+        if policy in POLICIES:
+            bot = POLICIES[policy]
+            timestep = PHYSICS_TIMESTEP
+            driver = None
+        else:
+            driver = ReplayDriver(Recording.load(policy), simulation)
+            bot = None
+            timestep = driver.recording.timestep
+
+        max_steps = round(seconds / timestep)
+        while simulation.frame_count < max_steps and simulation.outcome is None:
+            if driver is not None:
+                driver.before_step()
+            elif bot is not None:
+                bot(simulation)
+            simulation.step(timestep)
+
+        return {
+            "run": run_id,
+            "parameters": parameters,
+            "policy": policy,
+            "seed": seed,
+            "outcome": simulation.outcome,
+            "time": simulation.game_time_elapsed,
+            "score": simulation.score,
+            "frames": simulation.frame_count,
+            "collisions": dict(profiler.counters),
+        }
+    finally:
+        apply_parameters(previous)
+
+
+def run_batch(parameter_sets, policy="run_right", runs=1, workers=None, map_name=MAP_NAME, seconds=None):
+    """Play every parameter set several times over a pool of processes.
+
+    :param parameter_sets: list of dictionaries of "module.NAME" -> value
+    :type parameter_sets: list
+    :param policy: name of a bot of POLICIES, or path of a recording
+    :type policy: str
+    :param runs: number of runs of each parameter set
+    :type runs: int
+    :param workers: number of processes, one per core if None
+    :type workers: int
+    :param map_name: path of the tiled map to play
+    :type map_name: str
+    :param seconds: simulated seconds after which a run is stopped, a bit after GAME_LENGTH if None
+    :type seconds: float
+    :return: generator of the outcome of each run, in the order they finish
+    """
+    # runs of the same parameters follow each other, so workers can reuse their simulation
+    tasks = [(run_id, parameters, policy, seed, map_name, seconds)
+             for run_id, (parameters, seed) in enumerate(itertools.product(parameter_sets, range(runs)))]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+        futures = [executor.submit(run_one, task) for task in tasks]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def summarize(results):
+    """Sum up the runs of each parameter set.
+
+    :param results: outcomes of the runs
+    :type results: list
+    :return: one row per parameter set
+    :rtype: list
+    """
+    groups = {}
+    for result in results:
+        key = tuple(sorted(result["parameters"].items()))
+        groups.setdefault(key, []).append(result)
+
+    rows = []
+    for key, group in groups.items():
+        count = len(group)
+        collisions = {}
+        for result in group:
+            for name, value in result["collisions"].items():
+                collisions[name] = collisions.get(name, 0) + value
+        row = dict(key)
+        row.update({
+            "runs": count,
+            "win_rate": sum(1 for result in group if result["outcome"] == WIN) / count,
+            "mean_time": sum(result["time"] for result in group) / count,
+            "mean_score": sum(result["score"] for result in group) / count,
+        })
+        for name, value in sorted(collisions.items()):
+            row[name] = value / count
+        rows.append(row)
+    return rows
+
+
+def print_table(rows):
+    """Print rows as a text table.
+
+    :param rows: list of dictionaries
+    :type rows: list
+    """
+    columns = list(dict.fromkeys(column for row in rows for column in row))
+    cells = [[format_cell(row.get(column, "")) for column in columns] for row in rows]
+    widths = [max([len(column)] + [len(line[index]) for line in cells]) for index, column in enumerate(columns)]
+    print("  ".join(column.rjust(width) for column, width in zip(columns, widths)))
+    for line in cells:
+        print("  ".join(cell.rjust(width) for cell, width in zip(line, widths)))
+
+
+def format_cell(value):
+    """Format a value of a table."""
+    if isinstance(value, float):
+        return f"{value:.2f}"
+    return str(value)
+
+
+def main():
+    """Call main function."""
+    parser = argparse.ArgumentParser(description="Run many headless games in parallel")
+    parser.add_argument("--set", action="append", default=[], metavar="module.NAME=value,value",
+                        help="values of a constant to try, every combination is run")
+    parser.add_argument("--policy", default="run_right",
+                        help=f"bot playing the games, one of {', '.join(POLICIES)}, or a recording to replay")
+    parser.add_argument("--runs", type=int, default=1, help="runs of each combination of parameters")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="number of processes")
+    parser.add_argument("--seconds", type=float,
+                        help="simulated seconds after which a run is stopped, a bit after the end of the game by default")
+    parser.add_argument("--map", default=MAP_NAME, help="tiled map to play")
+    parser.add_argument("--csv", metavar="FILE", help="write the outcome of every run to FILE")
+    args = parser.parse_args()
+
+    parameter_sets = parameter_grid(args.set)
+    results = []
+    for result in run_batch(parameter_sets, args.policy, args.runs, args.workers, args.map, args.seconds):
+        results.append(result)
+        print(f"run {result['run']}: {result['parameters']} -> {result['outcome']}, "
+              f"time {result['time']:.2f} s, score {result['score']}")
+
+    print()
+    print_table(summarize(results))
+
+    if args.csv:
+        rows = []
+        for result in sorted(results, key=lambda result: result["run"]):
+            row = {"run": result["run"], "policy": result["policy"], "seed": result["seed"]}
+            row.update(result["parameters"])
+            row.update({name: result[name] for name in ("outcome", "time", "score", "frames")})
+            row.update(result["collisions"])
+            rows.append(row)
+        columns = list(dict.fromkeys(column for row in rows for column in row))
+        with open(args.csv, "w", newline="") as csv_file:
+            writer = csv.DictWriter(csv_file, fieldnames=columns)
+            writer.writeheader()
+            writer.writerows(rows)
+
+
+if __name__ == "__main__":
+    main()
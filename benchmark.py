@@ -0,0 +1,358 @@
+"""
+This script measures the performance of the game.
+
+Scenarios:
+    cold start      start python, open the window and draw InstructionsView
+    restart         build a new GameView and call setup(), or call reset()
+    setup <map>     GameView.setup() on a map
+    update <map>    one frame of scripted play through GameView.on_update()
+    draw <map>      one frame of GameView.on_draw(), in a hidden window
+
+The maps are map.tmx and stress maps built from it, where the level and its
+enemies and items are repeated 10 and 100 times along x. Sounds are muted
+and the window is hidden. Results are written as JSON, and two result files
+can be compared to find regressions.
+
+Usage:
+    python benchmark.py run [--output FILE] [--repeats N] [--seconds S] [--scales 1 10 100]
+    python benchmark.py compare BASELINE CURRENT [--threshold 0.1]
+
+Developers: DemonCyborg, Taterstew, pillitoka, ballipilla
+"""
+
+import os
+import sys
+import copy
+import json
+import time
+import zlib
+import base64
+import struct
+import platform
+import argparse
+import statistics
+import subprocess
+import xml.etree.ElementTree as ElementTree
+
+import arcade
+
+import sound_bank
+from game_view import GameView
+from simulation import MAP_NAME, PHYSICS_TIMESTEP, run_right_policy
+from run_game import SCREEN_WIDTH, SCREEN_HEIGHT, SCREEN_TITLE, SPRITE_SIZE
+
+# Number of times each scenario is run, when not given on the command line
+DEFAULT_REPEATS = 10
+
+# Seconds of play measured on each map, when not given on the command line
+DEFAULT_SECONDS = 10
+
+# Stress maps are map.tmx repeated this many times along x
+DEFAULT_SCALES = (1, 10, 100)
+
+# A scenario regressed when its median is slower than the baseline by more than this fraction
+DEFAULT_THRESHOLD = 0.1
+
+# Version of the result files
+RESULTS_VERSION = 1
+
+# Layers only kept in the last copy of a stress map, so the level ends once
+END_LAYERS = ("game_end_marker",)
+# Tiles of the stage layer only kept in the last copy, the wall at the end of the level
+END_TILE_IMAGES = ("stage_end.png",)
+
+# Script timed by the cold start scenario, run in a new python process
+COLD_START_SCRIPT = """
+import arcade
+from instructions_view import InstructionsView
+from run_game import SCREEN_WIDTH, SCREEN_HEIGHT, SCREEN_TITLE, SPRITE_SIZE
+window = arcade.Window(SCREEN_WIDTH, SCREEN_HEIGHT, SCREEN_TITLE, visible=False)
+view = InstructionsView(SCREEN_WIDTH, SCREEN_HEIGHT, SPRITE_SIZE)
+window.show_view(view)
+view.on_draw()
+window.ctx.finish()
+"""
+
+
+def time_call(function, repeats):
+    """Call a function several times and return how long each call took.
+
+    :param function: function to call, without arguments
+    :type function: callable
+    :param repeats: number of calls
+    :type repeats: int
+    :return: duration of each call in seconds
+    :rtype: list
+    """
+    durations = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def summarize(durations):
+    """Return the statistics of the durations of a scenario.
+
+    :param durations: duration of each run in seconds
+    :type durations: list
+    :return: number of runs, median, mean, min and max in ms
+    :rtype: dict
+    """
+    return {
+        "runs": len(durations),
+        "median_ms": statistics.median(durations) * 1000,
+        "mean_ms": statistics.mean(durations) * 1000,
+        "min_ms": min(durations) * 1000,
+        "max_ms": max(durations) * 1000,
+    }
+
+
+def print_durations(name, durations):
+    """Print a summary of the durations of a scenario.
+
+    :param name: name of the scenario
+    :type name: str
+    :param durations: duration of each run in seconds
+    :type durations: list
+    """
+    print(f"{name:<24} median {statistics.median(durations) * 1000:8.2f} ms"
+          f"   min {min(durations) * 1000:8.2f} ms   max {max(durations) * 1000:8.2f} ms")
+
+
+def generate_stress_map(scale, map_name=MAP_NAME):
+    """Write a map where every layer of a map is repeated along x.
+
+    The level, its enemies, its items and its lights are repeated, the end of the level
+    is only kept in the last copy. The map is written next to the original,
+    so the paths of its tilesets and images stay valid.
+
+    :param scale: number of copies
+    :type scale: int
+    :param map_name: path of the tiled map to repeat
+    :type map_name: str
+    :return: path of the stress map
+    :rtype: str
+    """
+    stress_name = os.path.join(os.path.dirname(map_name), f"stress_x{scale}.tmx")
+    if os.path.exists(stress_name) and os.path.getmtime(stress_name) >= os.path.getmtime(map_name):
+        return stress_name
+
+    tree = ElementTree.parse(map_name)
+    root = tree.getroot()
+    width = int(root.get("width"))
+    height = int(root.get("height"))
+
+    # gids of the tiles only kept at the end of the level
+    end_gids = set()
+    for tileset in root.findall("tileset"):
+        for tile in tileset.findall("tile"):
+            image = tile.find("image")
+            if image is not None and os.path.basename(image.get("source")) in END_TILE_IMAGES:
+                end_gids.add(int(tileset.get("firstgid")) + int(tile.get("id")))
+
+    for layer in root.findall("layer"):
+        data = layer.find("data")
+        raw = zlib.decompress(base64.b64decode(data.text.strip()))
+        gids = struct.unpack(f"<{width * height}I", raw)
+        is_end_layer = layer.get("name") in END_LAYERS
+
+        stress_gids = []
+        for row in range(height):
+            row_gids = gids[row * width:(row + 1) * width]
+            if is_end_layer:
+                start_gids = [0] * width
+            else:
+                start_gids = [0 if gid in end_gids else gid for gid in row_gids]
+            stress_gids.extend(start_gids * (scale - 1))
+            stress_gids.extend(row_gids)
+
+        data.text = base64.b64encode(zlib.compress(struct.pack(f"<{len(stress_gids)}I", *stress_gids))).decode("ascii")
+        layer.set("width", str(width * scale))
+
+    # objects, like the lights, are repeated too, with new ids
+    copy_width = width * int(root.get("tilewidth"))
+    next_id = int(root.get("nextobjectid"))
+    for group in root.findall("objectgroup"):
+        for element in list(group.findall("object")):
+            for index in range(1, scale):
+                stress_element = copy.deepcopy(element)
+                stress_element.set("id", str(next_id))
+                stress_element.set("x", str(float(element.get("x", 0)) + index * copy_width))
+                group.append(stress_element)
+                next_id += 1
+    root.set("nextobjectid", str(next_id))
+    root.set("width", str(width * scale))
+
+    tree.write(stress_name, encoding="UTF-8", xml_declaration=True)
+    return stress_name
+
+
+def benchmark_cold_start(repeats):
+    """Time starting the game up to the first frame of InstructionsView, in a new process each time.
+
+    :param repeats: number of runs
+    :type repeats: int
+    :return: duration of each run in seconds
+    :rtype: list
+    """
+    command = [sys.executable, "-c", COLD_START_SCRIPT]
+    directory = os.path.dirname(os.path.abspath(__file__))
+    return time_call(lambda: subprocess.run(command, cwd=directory, check=True), repeats)
+
+
+def benchmark_play(window, game_view, seconds):
+    """Play a game with a bot and time each update and draw.
+
+    The game is reset each time it ends.
+
+    :param window: the hidden window
+    :type window: arcade.Window
+    :param game_view: a game that was set up
+    :type game_view: GameView
+    :param seconds: simulated seconds of play
+    :type seconds: float
+    :return: duration of each update and of each draw, in seconds
+    :rtype: tuple
+    """
+    window.show_view(game_view)
+    update_durations = []
+    draw_durations = []
+    for _ in range(round(seconds / PHYSICS_TIMESTEP)):
+        run_right_policy(game_view.sim)
+
+        start = time.perf_counter()
+        game_view.on_update(PHYSICS_TIMESTEP)
+        update_durations.append(time.perf_counter() - start)
+
+        if window.current_view is not game_view:
+            # the game ended
+            game_view.reset()
+            window.show_view(game_view)
+
+        start = time.perf_counter()
+        game_view.on_draw()
+        window.ctx.finish()
+        draw_durations.append(time.perf_counter() - start)
+    return update_durations, draw_durations
+
+
+def run(args):
+    """Run every scenario and write the results.
+
+    :param args: arguments of the command line
+    :type args: argparse.Namespace
+    :return: exit code
+    :rtype: int
+    """
+    results = {}
+
+    def record(name, durations):
+        print_durations(name, durations)
+        results[name] = summarize(durations)
+
+    record("cold start", benchmark_cold_start(args.repeats))
+
+    sound_bank.set_muted(True)
+    window = arcade.Window(SCREEN_WIDTH, SCREEN_HEIGHT, SCREEN_TITLE, visible=False)
+
+    def restart_with_setup():
+        game_view = GameView(SCREEN_WIDTH, SCREEN_HEIGHT, SPRITE_SIZE)
+        game_view.setup()
+
+    game_view = GameView(SCREEN_WIDTH, SCREEN_HEIGHT, SPRITE_SIZE)
+    game_view.setup()
+    record("restart (setup)", time_call(restart_with_setup, args.repeats))
+    record("restart (reset)", time_call(game_view.reset, args.repeats))
+
+    for scale in args.scales:
+        map_name = MAP_NAME if scale == 1 else generate_stress_map(scale)
+        label = os.path.basename(map_name)
+
+        def setup():
+            game_view = GameView(SCREEN_WIDTH, SCREEN_HEIGHT, SPRITE_SIZE, map_name=map_name)
+            game_view.setup()
+            return game_view
+
+        # the first setup compiles the level, time the ones after
+        game_view = setup()
+        record(f"setup {label}", time_call(setup, args.repeats))
+
+        update_durations, draw_durations = benchmark_play(window, game_view, args.seconds)
+        record(f"update {label}", update_durations)
+        record(f"draw {label}", draw_durations)
+
+    if args.output:
+        with open(args.output, "w") as results_file:
+            json.dump({
+                "version": RESULTS_VERSION,
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "arcade": arcade.VERSION,
+                "results": results,
+            }, results_file, indent=2)
+        print(f"results written to {args.output}")
+    return 0
+
+
+def compare(args):
+    """Compare two result files and report the scenarios that got slower.
+
+    :param args: arguments of the command line
+    :type args: argparse.Namespace
+    :return: exit code, 1 if a scenario regressed
+    :rtype: int
+    """
+    with open(args.baseline) as baseline_file:
+        baseline = json.load(baseline_file)["results"]
+    with open(args.current) as current_file:
+        current = json.load(current_file)["results"]
+
+    regressed = False
+    for name, result in current.items():
+        if name not in baseline:
+            print(f"{name:<24} {result['median_ms']:8.2f} ms   (new)")
+            continue
+        before = baseline[name]["median_ms"]
+        after = result["median_ms"]
+        change = (after - before) / before if before else 0
+        flag = ""
+        if change > args.threshold:
+            flag = "   REGRESSION"
+            regressed = True
+        print(f"{name:<24} {before:8.2f} ms -> {after:8.2f} ms   {change:+7.1%}{flag}")
+    for name in baseline:
+        if name not in current:
+            print(f"{name:<24} (missing)")
+    return 1 if regressed else 0
+
+
+def main():
+    """Call main function."""
+    parser = argparse.ArgumentParser(description="Raccoon City benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run the benchmarks")
+    run_parser.add_argument("--output", metavar="FILE", help="write the results to FILE as JSON")
+    run_parser.add_argument("--repeats", type=int, default=DEFAULT_REPEATS,
+                            help="number of times the start and setup scenarios are run")
+    run_parser.add_argument("--seconds", type=float, default=DEFAULT_SECONDS,
+                            help="simulated seconds of play on each map")
+    run_parser.add_argument("--scales", type=int, nargs="+", default=DEFAULT_SCALES,
+                            help="maps to run, 1 is map.tmx and N is it repeated N times")
+
+    compare_parser = commands.add_parser("compare", help="compare two result files")
+    compare_parser.add_argument("baseline", help="results to compare against")
+    compare_parser.add_argument("current", help="new results")
+    compare_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                                help="fraction a median can grow by before it is a regression")
+
+    args = parser.parse_args()
+    if args.command == "run":
+        sys.exit(run(args))
+    sys.exit(compare(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+"""
+This script defines the class for the bubblegum shot by the cats.
+
+Bubblegums are taken from a pool, created with their physics bodies when the
+level is set up. A bubblegum that expires or leaves the activation range is
+taken out of the physics space and the sprite lists, and the next shot
+reuses it, so firing allocates nothing.
+
+Developers: DemonCyborg, Taterstew, pillitoka, ballipilla
+"""
+
+import os
+import math
+import arcade
+
+import asset_registry
+
+# --- Bubblegum states
+FLYING = 0
+LANDED = 1
+EXPIRED = 2
+
+# How long a bubblegum stays on the floor before it disappears, in seconds
+BUBBLEGUM_LIFETIME = 10
+
+# Maximum number of bubblegums alive at the same time, the size of the pool.
+# When every bubblegum is in use, the oldest one is shot again.
+MAX_BUBBLEGUMS = 20
+
+# A bubblegum that falls below this height has left the level
+MIN_HEIGHT = 0
+
+# --- Physics of a bubblegum
+BUBBLEGUM_MASS = 0.1
+BUBBLEGUM_DAMPING = 1.0
+BUBBLEGUM_FRICTION = 0.6
+BUBBLEGUM_ELASTICITY = 0.9
+BUBBLEGUM_GRAVITY = (0, -300)
+# Force pushing a bubblegum when it is shot, along its angle
+BUBBLEGUM_FORCE = (5000, 0)
+
+
+class BubblegumSprite(arcade.SpriteSolidColor):
+    """Class for Bubblegum.
+
+    A bubblegum flies until it touches the ground, then it lands, turns into a
+    sticky bubblegum and stays there until it expires.
+    """
+
+    def __init__(self):
+        """Initialize the class."""
+        # Let parent initialize
+        super().__init__(20, 5, arcade.color.PINK_SHERBET)
+
+        # Texture used while the bubblegum flies, and once it has landed
+        self.flying_texture = self.texture
+        self.landed_texture = asset_registry.load_texture(os.path.join("resources/images/cat", "bubblegum.png"))
+
+        # Current state of the bubblegum
+        self.state = FLYING
+
+        # How long the bubblegum has been on the ground
+        self.time_landed = 0
+
+        # Moment of inertia of the body, restored when the body is made dynamic again
+        self.moment = None
+
+    def launch(self, physics_engine, position, angle):
+        """Shoot the bubblegum, its body must already be in the physics space.
+
+        :param physics_engine: The physics engine
+        :type physics_engine: arcade.PymunkPhysicsEngine
+        :param position: where the bubblegum starts
+        :type position: tuple
+        :param angle: direction of the shot in radians
+        :type angle: float
+        """
+        self.state = FLYING
+        self.time_landed = 0
+        self.texture = self.flying_texture
+        self.position = position
+        self.angle = math.degrees(angle)
+
+        # a landed bubblegum was made kinematic, which dropped its mass
+        body = physics_engine.get_physics_object(self).body
+        if body.body_type != arcade.PymunkPhysicsEngine.DYNAMIC:
+            body.body_type = arcade.PymunkPhysicsEngine.DYNAMIC
+            body.mass = BUBBLEGUM_MASS
+            body.moment = self.moment
+        body.position = position
+        body.angle = angle
+        body.angular_velocity = 0
+
+        physics_engine.apply_force(self, BUBBLEGUM_FORCE)
+        physics_engine.set_velocity(self, (0.01, 0.01))
+
+    def update_state(self, physics_engine, contacts, delta_time):
+        """Advance the state machine of the bubblegum.
+
+        :param physics_engine: The physics engine
+        :type physics_engine: arcade.PymunkPhysicsEngine
+        :param contacts: contacts of the bodies after the last step
+        :type contacts: ContactCache
+        :param delta_time: Time interval since the last update in seconds.
+        :type delta_time: float
+        """
+        if self.state == FLYING:
+            if contacts.is_on_ground(self):
+                self.land(physics_engine)
+            elif self.center_y < MIN_HEIGHT:
+                self.expire()
+        elif self.state == LANDED:
+            self.time_landed += delta_time
+            if self.time_landed > BUBBLEGUM_LIFETIME:
+                self.expire()
+
+    def land(self, physics_engine):
+        """Turn the bubblegum into a sticky bubblegum on the floor.
+
+        This runs only once. The body is stopped, straightened and made
+        kinematic so it stays where it landed without any further updates.
+
+        :param physics_engine: The physics engine
+        :type physics_engine: arcade.PymunkPhysicsEngine
+        """
+        self.state = LANDED
+        self.time_landed = 0
+        self.angle = 0
+        self.texture = self.landed_texture
+        physics_engine.set_velocity(self, (0, 0))
+        body = physics_engine.get_physics_object(self).body
+        body.angle = 0
+        body.angular_velocity = 0
+        body.body_type = arcade.PymunkPhysicsEngine.KINEMATIC
+
+    def expire(self):
+        """Mark the bubblegum as done, the pool takes it back."""
+        self.state = EXPIRED
+
+
+class BubblegumPool:
+    """Bubblegums created once, with their physics bodies, and shot again and again."""
+
+    def __init__(self, physics_engine, bullet_list, contacts, size=MAX_BUBBLEGUMS):
+        """Initialize the class and create the bubblegums.
+
+        :param physics_engine: The physics engine
+        :type physics_engine: arcade.PymunkPhysicsEngine
+        :param bullet_list: list the bubblegums in use are in
+        :type bullet_list: arcade.SpriteList
+        :param contacts: contacts of the bodies, it must track bullet_list
+        :type contacts: ContactCache
+        :param size: number of bubblegums, the most that can be in use at the same time
+        :type size: int
+        """
+        self.physics_engine = physics_engine
+        self.bullet_list = bullet_list
+        self.contacts = contacts
+        # bubblegums that are not in use
+        self.free = []
+
+        for _ in range(size):
+            bullet = BubblegumSprite()
+            physics_engine.add_sprite(bullet,
+                                      mass=BUBBLEGUM_MASS,
+                                      damping=BUBBLEGUM_DAMPING,
+                                      friction=BUBBLEGUM_FRICTION,
+                                      collision_type="bullet",
+                                      gravity=BUBBLEGUM_GRAVITY,
+                                      elasticity=BUBBLEGUM_ELASTICITY)
+            bullet.moment = physics_engine.get_physics_object(bullet).body.moment
+            self._park(bullet)
+
+    def _park(self, bullet):
+        """Take a bubblegum out of the physics space and put it back in the pool.
+
+        The sprite stays registered with the physics engine, so its body and
+        shape are kept for the next shot.
+        """
+        bullet.state = EXPIRED
+        physics_object = self.physics_engine.get_physics_object(bullet)
+        if physics_object.body.space is not None:
+            self.physics_engine.space.remove(physics_object.body, physics_object.shape)
+        self.free.append(bullet)
+
+    def fire(self, position, angle):
+        """Shoot a bubblegum. When they are all in use, the oldest one is shot again.
+
+        :param position: where the bubblegum starts
+        :type position: tuple
+        :param angle: direction of the shot in radians
+        :type angle: float
+        :return: the bubblegum
+        :rtype: BubblegumSprite
+        """
+        if not self.free:
+            self.release(self.bullet_list[0])
+        bullet = self.free.pop()
+        physics_object = self.physics_engine.get_physics_object(bullet)
+        self.physics_engine.space.add(physics_object.body, physics_object.shape)
+        bullet.launch(self.physics_engine, position, angle)
+        self.bullet_list.append(bullet)
+        return bullet
+
+    def release(self, bullet):
+        """Take a bubblegum out of the game and back to the pool.
+
+        Unlike remove_from_sprite_lists(), this keeps the sprite in the physics engine.
+
+        :param bullet: a bubblegum in use
+        :type bullet: BubblegumSprite
+        """
+        for sprite_list in list(bullet.sprite_lists):
+            sprite_list.remove(bullet)
+        self._park(bullet)
+
+    def update(self, delta_time, min_x, max_x):
+        """Update the bubblegums in use, take back the ones that expired or left a range of x.
+
+        :param delta_time: Time interval since the last update in seconds.
+        :type delta_time: float
+        :param min_x: start of the range, usually the activation range
+        :type min_x: float
+        :param max_x: end of the range
+        :type max_x: float
+        """
+        # copy the list, released bubblegums are removed from it
+        for bullet in list(self.bullet_list):
+            bullet.update_state(self.physics_engine, self.contacts, delta_time)
+            if bullet.state == EXPIRED or not min_x <= bullet.center_x <= max_x:
+                self.release(bullet)
+
+    def reset(self):
+        """Take every bubblegum back."""
+        for bullet in list(self.bullet_list):
+            self.release(bullet)
@@ -8,19 +8,30 @@ import os
 import arcade
 import math
 
-# --- Animation constants.
-# Close enough to not-moving to have the animation go to idle.
-DEAD_ZONE = 0.05
+import asset_registry
 
-# Constants used to track if the player is facing left or right
-RIGHT_FACING = 0
-LEFT_FACING = 1
+# Time between two bubblegums shot by a cat, in seconds
+FIRE_INTERVAL = 2.0
+
+
+def cat_fields():
+    """Return the columns of the state of the cats, for an EntityStore."""
+    return {
+        # Has the cat shot at least once?
+        "has_attacked": (bool, False),
+        # Time left before the cat can shoot again
+        "reload_time": (float, 0.0),
+    }
 
-# How many pixels to move before we change the texture in the walking animation
-DISTANCE_TO_CHANGE_TEXTURE = 20
 
 class CatSprite(arcade.Sprite):
-    """Class for Cat."""
+    """Class for Cat.
+
+    The state of the cats is kept in an EntityStore, the sprite only draws the cat.
+    """
+
+    # Texture shared by every cat
+    idle_texture = None
 
     def __init__(self, scale):
         """Initialize the class."""
@@ -30,72 +41,66 @@ class CatSprite(arcade.Sprite):
         # Set our scale
         self.scale = scale
 
-        # Load textures 
+        # Load textures, once for every cat
         resource_path = "resources/images/cat"
-        self.idle_texture = arcade.load_texture(os.path.join(resource_path, "cat_idle.png"))
-        self.fly_texture = arcade.load_texture(os.path.join(resource_path, "cat_idle.png"))
+        if CatSprite.idle_texture is None:
+            CatSprite.idle_texture = asset_registry.load_texture(os.path.join(resource_path, "cat_idle.png"))
 
         # Set the initial texture
         self.texture = self.idle_texture
 
         # Hit box will be set based on the first image used.
-        self.hit_box = self.texture.hit_box_points
-
-        # Default to face-right
-        self.character_face_direction = RIGHT_FACING
-
-        # Index of our current texture
-        self.cur_texture = 0
-
-        # Is the sprite cloe to the player?
-        self.is_close_to_player = False
-
-        # Has the owl started attacking?
-        self.has_attacked = False
-        self.attack_steps = 100
-    
-    def attack_player(self, player, bullet_list, physics_engine, delta_time):
-        if self.has_attacked is False:
-            # shoot a bubblegum
-            start_x = self.center_x
-            start_y = self.center_y
-            
-            bullet = arcade.SpriteSolidColor(20, 5, arcade.color.PINK_SHERBET)
-            bullet.position = self.position
-            
-            # dest_x = (self.center_x + player.center_x) / 2
-            # dest_y = self.center_y - self.height/2
-
-            dest_x = player.center_x
-            dest_y = self.center_y * 0.75
-
-            x_diff = dest_x - start_x
-            y_diff = dest_y - start_y
-            angle = math.atan2(y_diff, x_diff)
-
-            size = max(self.width, self.height) / 2
-
-            bullet.center_x += size * math.cos(angle)
-            bullet.center_y += size * math.sin(angle)
-
-            bullet.angle = math.degrees(angle)
-
-            bullet_gravity = (0, -300)
-
-            physics_engine.add_sprite(bullet,
-                                       mass=0.1,
-                                       damping=1.0,
-                                       friction=0.6,
-                                       collision_type="bullet",
-                                       gravity=bullet_gravity,
-                                       elasticity=0.9)
-
-            force = (5000, 0)
-            physics_engine.apply_force(bullet, force)
-            physics_engine.set_velocity(bullet,(0.01,0.01))
-            bullet_list.append(bullet)
-
-        self.has_attacked = True
-                    
-
-        
+        self.hit_box = asset_registry.load_hit_box(os.path.join(resource_path, "cat_idle.png"))
+
+    def reset(self):
+        """Restore the look the cat had when it was created."""
+        self.texture = self.idle_texture
+
+
+def update_cats(store, indices, player, bubblegum_pool, attack_distance, delta_time):
+    """Make the cats close to the player shoot a bubblegum at it, once every FIRE_INTERVAL.
+
+    :param store: state of the cats
+    :type store: EntityStore
+    :param indices: rows of the cats to update, the awake ones
+    :type indices: list
+    :param player: the player
+    :type player: PlayerSprite
+    :param bubblegum_pool: pool the bubblegums are taken from
+    :type bubblegum_pool: BubblegumPool
+    :param attack_distance: cats closer than this to the player shoot at it
+    :type attack_distance: float
+    :param delta_time: Time interval since the last update in seconds.
+    :type delta_time: float
+    """
+    if not indices:
+        return
+    indices = store.near(indices, player, attack_distance)[0]
+    if not len(indices):
+        return
+    reload_time = store["reload_time"]
+    reload_time[indices] -= delta_time
+    firing = indices[reload_time[indices] <= 0]
+    reload_time[firing] = FIRE_INTERVAL
+    store["has_attacked"][firing] = True
+
+    for index in firing.tolist():
+        cat = store.sprites[index]
+
+        # shoot a bubblegum
+        start_x = cat.center_x
+        start_y = cat.center_y
+
+        # dest_x = (cat.center_x + player.center_x) / 2
+        # dest_y = cat.center_y - cat.height/2
+
+        dest_x = player.center_x
+        dest_y = cat.center_y * 0.75
+
+        x_diff = dest_x - start_x
+        y_diff = dest_y - start_y
+        angle = math.atan2(y_diff, x_diff)
+
+        size = max(cat.width, cat.height) / 2
+
+        bubblegum_pool.fire((start_x + size * math.cos(angle), start_y + size * math.sin(angle)), angle)
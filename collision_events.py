@@ -0,0 +1,125 @@
+"""
+This script defines the collision events of the game.
+
+A post_handler of the physics engine runs on every step for as long as two
+shapes touch, so a long contact took points and played sounds over and
+over. Here the begin and separate callbacks of pymunk only put an enter or
+exit event in a queue, and the queue is handled once after the step. An
+enter event of a pair of sprites is dropped when the same pair entered less
+than a cooldown ago, which also covers sprites that bounce on each other.
+
+Developers: DemonCyborg, Taterstew, pillitoka, ballipilla
+"""
+
+from collections import deque
+
+# --- Kinds of event
+ENTER = 0
+EXIT = 1
+
+# Time before the same pair of sprites can enter again, in seconds
+DEFAULT_COOLDOWN = 1.0
+
+
+class CollisionEvents:
+    """Queue of the collisions that started or ended during a step, handled after it."""
+
+    def __init__(self, physics_engine):
+        """Initialize the class.
+
+        :param physics_engine: The physics engine
+        :type physics_engine: arcade.PymunkPhysicsEngine
+        """
+        self.physics_engine = physics_engine
+
+        # (kind, handler, sprite_a, sprite_b) of the events of the current step
+        self.queue = deque()
+        # pairs of sprites in contact, (sprite_a, sprite_b)
+        self.touching = set()
+        # pair of sprites -> game time after which it can enter again
+        self.cooldowns = {}
+        # game time, advanced by each step
+        self.time = 0
+
+        # shape -> sprite, the shapes of the sprites are never replaced while the game runs
+        self.shape_sprites = {}
+
+    def _collision_type_id(self, collision_type):
+        """Return the id pymunk knows a collision type by, registering it if needed."""
+        collision_types = self.physics_engine.collision_types
+        if collision_type not in collision_types:
+            collision_types.append(collision_type)
+        return collision_types.index(collision_type)
+
+    def _sprites(self, arbiter):
+        """Return the sprites of the two shapes of an arbiter."""
+        sprites = []
+        for shape in arbiter.shapes:
+            sprite = self.shape_sprites.get(shape)
+            if sprite is None:
+                sprite = self.physics_engine.get_sprite_for_shape(shape)
+                self.shape_sprites[shape] = sprite
+            sprites.append(sprite)
+        return sprites
+
+    def add_handler(self, first_type, second_type, on_enter=None, on_exit=None, cooldown=DEFAULT_COOLDOWN):
+        """Handle the collisions between two collision types.
+
+        The handlers are called with the two sprites, the first one of first_type.
+
+        :param first_type: collision type of the first sprite
+        :type first_type: str
+        :param second_type: collision type of the second sprite
+        :type second_type: str
+        :param on_enter: called after the step in which the sprites started to touch
+        :type on_enter: callable
+        :param on_exit: called after the step in which the sprites stopped touching
+        :type on_exit: callable
+        :param cooldown: time before the same pair can enter again, in seconds
+        :type cooldown: float
+        """
+        # The callbacks are set on the pymunk space itself: the wrappers of
+        # PymunkPhysicsEngine.add_collision_handler() drop the return value of a begin
+        # callback, and pymunk warns on every contact that starts.
+        def begin_handler(arbiter, _space, _data):
+            sprite_a, sprite_b = self._sprites(arbiter)
+            pair = (sprite_a, sprite_b)
+            self.touching.add(pair)
+            if on_enter is not None and self.cooldowns.get(pair, -1) <= self.time:
+                self.cooldowns[pair] = self.time + cooldown
+                self.queue.append((ENTER, on_enter, sprite_a, sprite_b))
+            # the bodies still collide
+            return True
+
+        def separate_handler(arbiter, _space, _data):
+            sprite_a, sprite_b = self._sprites(arbiter)
+            pair = (sprite_a, sprite_b)
+            if pair not in self.touching:
+                return
+            self.touching.discard(pair)
+            if on_exit is not None:
+                self.queue.append((EXIT, on_exit, sprite_a, sprite_b))
+
+        handler = self.physics_engine.space.add_collision_handler(self._collision_type_id(first_type),
+                                                                  self._collision_type_id(second_type))
+        handler.begin = begin_handler
+        handler.separate = separate_handler
+
+    def dispatch(self, delta_time):
+        """Handle the events of the step that just ran. Call once after each step of the physics engine.
+
+        :param delta_time: Time advanced by the step in seconds.
+        :type delta_time: float
+        """
+        self.time += delta_time
+        queue = self.queue
+        while queue:
+            _kind, handler, sprite_a, sprite_b = queue.popleft()
+            handler(sprite_a, sprite_b)
+
+    def reset(self):
+        """Forget the contacts, the cooldowns and the events not handled yet."""
+        self.queue.clear()
+        self.touching.clear()
+        self.cooldowns.clear()
+        self.time = 0
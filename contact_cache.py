@@ -0,0 +1,80 @@
+"""
+This script defines the cache of the contacts of the bodies that need to know if they stand on something.
+
+PymunkPhysicsEngine.is_on_ground() walks the arbiters of a body each time it
+is called, and the player, the racoon boss, the bubblegums and the jump key
+all ask several times per step. The cache walks the arbiters of the tracked
+bodies once, right after the physics space moved and before the sprites are
+resynced, so every question asked until the next step is a set lookup.
+
+Developers: DemonCyborg, Taterstew, pillitoka, ballipilla
+"""
+
+
+class ContactCache:
+    """Which tracked sprites stand on something, and which touch anything, as of the last step."""
+
+    def __init__(self, physics_engine):
+        """Initialize the class.
+
+        :param physics_engine: The physics engine
+        :type physics_engine: arcade.PymunkPhysicsEngine
+        """
+        self.physics_engine = physics_engine
+        # sprite lists whose sprites are tracked, sprites added to them later are tracked too
+        self.sprite_lists = []
+
+        # sprites standing on something
+        self.grounded = set()
+        # sprites touching anything
+        self.touching = set()
+
+        # sprite whose arbiters are being walked
+        self._sprite = None
+
+    def track(self, sprite_list):
+        """Track the contacts of the sprites of a list.
+
+        :param sprite_list: sprites that are in the physics engine
+        :type sprite_list: arcade.SpriteList
+        """
+        self.sprite_lists.append(sprite_list)
+
+    def _check_arbiter(self, arbiter):
+        # same test as PymunkPhysicsEngine.check_grounding: the other shape is below
+        self.touching.add(self._sprite)
+        if arbiter.normal.y < 0:
+            self.grounded.add(self._sprite)
+
+    def update(self):
+        """Walk the arbiters of every tracked sprite. Call once after each step of the physics space."""
+        self.clear()
+        get_physics_object = self.physics_engine.get_physics_object
+        for sprite_list in self.sprite_lists:
+            for sprite in sprite_list:
+                self._sprite = sprite
+                get_physics_object(sprite).body.each_arbiter(self._check_arbiter)
+        self._sprite = None
+
+    def clear(self):
+        """Forget the contacts of the last step, nothing stands on anything until the next update()."""
+        self.grounded.clear()
+        self.touching.clear()
+
+    def is_on_ground(self, sprite):
+        """Return True if the sprite stood on something after the last step.
+
+        :param sprite: a tracked sprite
+        :type sprite: arcade.Sprite
+        :rtype: bool
+        """
+        return sprite in self.grounded
+
+    def is_touching(self, sprite):
+        """Return True if the sprite touched anything after the last step.
+
+        :param sprite: a tracked sprite
+        :type sprite: arcade.Sprite
+        :rtype: bool
+        """
+        return sprite in self.touching
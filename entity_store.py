@@ -0,0 +1,87 @@
+"""
+This script defines the store of the gameplay state of the enemies.
+
+Each kind of enemy keeps its state in columns: one typed NumPy array per
+field, with one row per enemy, in the order of its sprite list. The sprites
+are left with what arcade and pymunk need to draw and move them, and the AI
+of a kind reads and writes whole columns for the rows of the awake enemies
+instead of attributes spread over as many Python objects as there are
+enemies.
+
+Developers: DemonCyborg, Taterstew, pillitoka, ballipilla
+"""
+
+import numpy as np
+
+
+class EntityStore:
+    """Gameplay state of the sprites of a list, one NumPy array per field."""
+
+    def __init__(self, sprites, fields):
+        """Initialize the class. Every row starts with the default of each field.
+
+        :param sprites: the sprites, row i is the state of sprites[i]
+        :type sprites: arcade.SpriteList
+        :param fields: name -> (dtype, default value) of each column
+        :type fields: dict
+        """
+        self.sprites = list(sprites)
+        self.columns = {name: np.full(len(self.sprites), default, dtype=dtype)
+                        for name, (dtype, default) in fields.items()}
+        # columns as they were when the snapshot was taken, restored by reset()
+        self.initial = None
+
+    def __len__(self):
+        return len(self.sprites)
+
+    def __getitem__(self, name):
+        """Return a column, changes to it change the state of the sprites.
+
+        :param name: name of the field
+        :type name: str
+        :rtype: numpy.ndarray
+        """
+        return self.columns[name]
+
+    def take_snapshot(self):
+        """Remember the state of every row, reset() goes back to it."""
+        self.initial = {name: column.copy() for name, column in self.columns.items()}
+
+    def reset(self):
+        """Restore the state of every row from the snapshot."""
+        for name, column in self.columns.items():
+            column[:] = self.initial[name]
+
+    def positions(self, indices):
+        """Return the positions of some sprites, as two arrays.
+
+        :param indices: rows of the sprites
+        :type indices: numpy.ndarray
+        :return: x and y of the sprites
+        :rtype: tuple
+        """
+        sprites = self.sprites
+        count = len(indices)
+        x = np.fromiter((sprites[index].center_x for index in indices.tolist()), dtype=float, count=count)
+        y = np.fromiter((sprites[index].center_y for index in indices.tolist()), dtype=float, count=count)
+        return x, y
+
+    def near(self, indices, target, distance):
+        """Return the rows among some rows whose sprite is closer than a distance to a sprite.
+
+        :param indices: rows to look at, like the awake ones
+        :type indices: list
+        :param target: the sprite to be close to, like the player
+        :type target: arcade.Sprite
+        :param distance: distance between the centers
+        :type distance: float
+        :return: the rows, the x and y offsets from each sprite to the target, and the distance
+        :rtype: tuple
+        """
+        indices = np.asarray(indices, dtype=np.intp)
+        x, y = self.positions(indices)
+        dx = target.center_x - x
+        dy = target.center_y - y
+        distances = np.hypot(dx, dy)
+        is_near = distances < distance
+        return indices[is_near], dx[is_near], dy[is_near], distances[is_near]
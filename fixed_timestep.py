@@ -0,0 +1,108 @@
+"""
+This script defines the fixed timestep of the game loop.
+
+The game always advances by steps of the same length, whatever the frame
+rate. The time of each frame is added to an accumulator, and as many steps
+as fit in it are run, so a fast display runs fewer steps per frame and a
+slow machine runs several. When a frame takes too long, the steps are
+capped and the game slows down instead of freezing to catch up.
+
+Sprites are drawn between their position before and after the last step,
+by how far the accumulator is into the next step, so movement stays smooth
+when the frame rate and the step rate differ.
+
+Developers: DemonCyborg, Taterstew, pillitoka, ballipilla
+"""
+
+# Most steps run in one frame, the time left over is dropped
+MAX_STEPS_PER_FRAME = 5
+
+# Sprites that moved more than this in one step were teleported, they are not interpolated
+TELEPORT_DISTANCE = 256
+
+
+class FixedTimestep:
+    """Accumulates the time of the frames and tells how many steps to run."""
+
+    def __init__(self, timestep, max_steps=MAX_STEPS_PER_FRAME):
+        """Initialize the class.
+
+        :param timestep: time advanced by each step in seconds
+        :type timestep: float
+        :param max_steps: most steps run in one frame
+        :type max_steps: int
+        """
+        self.timestep = timestep
+        self.max_steps = max_steps
+        self.accumulator = 0
+
+    def reset(self):
+        """Forget the time accumulated."""
+        self.accumulator = 0
+
+    def advance(self, delta_time):
+        """Add the time of a frame and return the number of steps to run.
+
+        :param delta_time: time since the last frame in seconds
+        :type delta_time: float
+        :return: number of steps to run
+        :rtype: int
+        """
+        self.accumulator += delta_time
+        steps = int(self.accumulator / self.timestep)
+        if steps > self.max_steps:
+            # too far behind, drop the time that cannot be caught up
+            steps = self.max_steps
+            self.accumulator = 0
+        else:
+            self.accumulator -= steps * self.timestep
+        return steps
+
+    @property
+    def alpha(self):
+        """How far the accumulator is into the next step, between 0 and 1."""
+        return min(self.accumulator / self.timestep, 1.0)
+
+
+class Interpolator:
+    """Moves sprites between their previous and current position while they are drawn."""
+
+    def __init__(self):
+        """Initialize the class."""
+        # sprite -> position before the last step
+        self.previous = {}
+        # sprite -> position after the last step, while the sprites are interpolated
+        self.current = {}
+
+    def reset(self):
+        """Forget the previous positions, after the sprites were moved by hand."""
+        self.previous.clear()
+        self.current.clear()
+
+    def capture(self, sprites):
+        """Remember the position of sprites before a step.
+
+        :param sprites: sprites that can move
+        :type sprites: iterable
+        """
+        self.previous = {sprite: sprite.position for sprite in sprites}
+
+    def apply(self, alpha):
+        """Move the sprites between their previous and current position. Call before drawing.
+
+        :param alpha: 0 for the previous position, 1 for the current one
+        :type alpha: float
+        """
+        for sprite, (previous_x, previous_y) in self.previous.items():
+            current_x, current_y = sprite.position
+            if abs(current_x - previous_x) > TELEPORT_DISTANCE or abs(current_y - previous_y) > TELEPORT_DISTANCE:
+                continue
+            self.current[sprite] = (current_x, current_y)
+            sprite.position = (previous_x + (current_x - previous_x) * alpha,
+                               previous_y + (current_y - previous_y) * alpha)
+
+    def restore(self):
+        """Move the sprites back to their current position. Call after drawing."""
+        for sprite, position in self.current.items():
+            sprite.position = position
+        self.current.clear()
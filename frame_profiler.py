@@ -0,0 +1,271 @@
+"""
+This script defines the frame profiler of the game.
+
+Phases of a frame are timed with named scopes, and collision handlers are
+counted. The profiler keeps the frame times of the last frames to compute
+percentiles, can draw them on screen, and can export every scope to a trace
+file that chrome://tracing or https://ui.perfetto.dev can open.
+
+When the profiler is disabled, a scope is a shared object doing nothing, so
+instrumented code costs one attribute lookup and one call per scope.
+
+Developers: DemonCyborg, Taterstew, pillitoka, ballipilla
+"""
+
+import json
+import time
+from collections import deque
+
+import arcade
+
+# Number of frames the percentiles are computed on
+FRAME_HISTORY = 600
+
+# Trace events kept for the trace file, the oldest are dropped
+MAX_TRACE_EVENTS = 200000
+
+# Percentiles of the frame time that are reported
+PERCENTILES = (50, 95, 99)
+
+# --- Overlay
+OVERLAY_COLOR = arcade.csscolor.WHITE
+OVERLAY_FONT_SIZE = 12
+OVERLAY_LINE_HEIGHT = 16
+# The text of the overlay is updated every this number of frames
+OVERLAY_REFRESH_FRAMES = 30
+
+
+class _NullScope:
+    """Scope used when the profiler is disabled."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+_NULL_SCOPE = _NullScope()
+
+
+class _Scope:
+    """Times the code inside a with statement."""
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.start = 0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.profiler.add_sample(self.name, self.start, time.perf_counter())
+        return False
+
+
+def percentile(values, percent):
+    """Return a percentile of a list of values, by nearest rank.
+
+    :param values: values
+    :type values: list
+    :param percent: percentile between 0 and 100
+    :type percent: float
+    :return: the percentile, 0 if there are no values
+    :rtype: float
+    """
+    if not values:
+        return 0
+    ordered = sorted(values)
+    rank = round(percent / 100 * (len(ordered) - 1))
+    return ordered[rank]
+
+
+class FrameProfiler:
+    """Times the phases of each frame and counts events."""
+
+    def __init__(self, frame_history=FRAME_HISTORY):
+        """Initialize the class. The profiler starts disabled.
+
+        :param frame_history: number of frames the percentiles are computed on
+        :type frame_history: int
+        """
+        self.enabled = False
+        self.counting = False
+        self.show_overlay = False
+        self.origin = time.perf_counter()
+
+        # Duration of the last frames, in seconds
+        self.frame_times = deque(maxlen=frame_history)
+        self.frame_start = None
+
+        # name -> durations of the scope in the last frames, in seconds
+        self.scope_times = {}
+        # name -> time spent in the scope during the current frame
+        self.current_scopes = {}
+
+        # name -> number of times the event happened
+        self.counters = {}
+
+        # Events of the trace file
+        self.trace_events = deque(maxlen=MAX_TRACE_EVENTS)
+
+        # Text drawn by the overlay
+        self.overlay_lines = []
+        self.frame_count = 0
+
+    def enable(self, show_overlay=False):
+        """Start profiling.
+
+        :param show_overlay: draw the frame times on screen
+        :type show_overlay: bool
+        """
+        self.enabled = True
+        self.counting = True
+        self.show_overlay = show_overlay
+
+    def enable_counters(self):
+        """Count events without timing anything, for headless runs."""
+        self.counting = True
+
+    def disable(self):
+        """Stop profiling."""
+        self.enabled = False
+        self.counting = False
+        self.show_overlay = False
+        self.frame_start = None
+
+    def clear(self):
+        """Forget everything that was measured."""
+        self.frame_times.clear()
+        self.frame_start = None
+        self.scope_times.clear()
+        self.current_scopes.clear()
+        self.counters.clear()
+        self.trace_events.clear()
+        self.overlay_lines = []
+        self.frame_count = 0
+
+    def scope(self, name):
+        """Return a context manager timing the code inside it.
+
+        :param name: name of the phase
+        :type name: str
+        """
+        if not self.enabled:
+            return _NULL_SCOPE
+        return _Scope(self, name)
+
+    def add_sample(self, name, start, end):
+        """Record a duration measured outside of a scope.
+
+        :param name: name of the phase
+        :type name: str
+        :param start: time.perf_counter() at the start
+        :type start: float
+        :param end: time.perf_counter() at the end
+        :type end: float
+        """
+        self.current_scopes[name] = self.current_scopes.get(name, 0) + end - start
+        self.trace_events.append({"name": name, "ph": "X", "pid": 0, "tid": 0,
+                                  "ts": (start - self.origin) * 1e6, "dur": (end - start) * 1e6})
+
+    def count(self, name):
+        """Count an event, like a call to a collision handler.
+
+        :param name: name of the event
+        :type name: str
+        """
+        if self.counting:
+            self.counters[name] = self.counters.get(name, 0) + 1
+
+    def mark_frame(self):
+        """Close the current frame and start the next one. Call once per frame."""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        if self.frame_start is not None:
+            self.frame_times.append(now - self.frame_start)
+            for name, duration in self.current_scopes.items():
+                times = self.scope_times.get(name)
+                if times is None:
+                    times = deque(maxlen=self.frame_times.maxlen)
+                    self.scope_times[name] = times
+                times.append(duration)
+            if self.counters:
+                self.trace_events.append({"name": "collisions", "ph": "C", "pid": 0, "tid": 0,
+                                          "ts": (now - self.origin) * 1e6, "args": dict(self.counters)})
+        self.current_scopes.clear()
+        self.frame_start = now
+
+        self.frame_count += 1
+        if self.show_overlay and self.frame_count % OVERLAY_REFRESH_FRAMES == 0:
+            self.overlay_lines = self.report()
+
+    def percentiles(self):
+        """Return the percentiles of the frame time.
+
+        :return: percentile -> frame time in seconds
+        :rtype: dict
+        """
+        frame_times = list(self.frame_times)
+        return {percent: percentile(frame_times, percent) for percent in PERCENTILES}
+
+    def summary(self):
+        """Return the measures as a dictionary.
+
+        :return: frame count, frame time percentiles, mean time of each scope and the counters, times in ms
+        :rtype: dict
+        """
+        return {
+            "frames": len(self.frame_times),
+            "frame_time_ms": {f"p{percent}": value * 1000 for percent, value in self.percentiles().items()},
+            "scopes_ms": {name: sum(times) / len(times) * 1000 for name, times in self.scope_times.items()},
+            "counters": dict(self.counters),
+        }
+
+    def report(self):
+        """Return the measures as lines of text.
+
+        :return: lines of text
+        :rtype: list
+        """
+        summary = self.summary()
+        lines = ["frame " + "  ".join(f"{name} {value:.1f} ms"
+                                      for name, value in summary["frame_time_ms"].items())]
+        for name, value in sorted(summary["scopes_ms"].items(), key=lambda item: -item[1]):
+            lines.append(f"{name}: {value:.2f} ms")
+        for name, value in sorted(summary["counters"].items()):
+            lines.append(f"{name}: {value}")
+        return lines
+
+    def draw_overlay(self, left, bottom, height):
+        """Draw the measures in the top left corner of the screen.
+
+        :param left: left of the viewport
+        :type left: float
+        :param bottom: bottom of the viewport
+        :type bottom: float
+        :param height: height of the screen
+        :type height: float
+        """
+        if not self.show_overlay:
+            return
+        y = bottom + height - OVERLAY_LINE_HEIGHT
+        for line in self.overlay_lines:
+            arcade.draw_text(line, left + 10, y, OVERLAY_COLOR, OVERLAY_FONT_SIZE)
+            y -= OVERLAY_LINE_HEIGHT
+
+    def export_chrome_trace(self, path):
+        """Write the scopes and counters to a trace file in the Chrome trace format.
+
+        :param path: path of the file
+        :type path: str
+        """
+        with open(path, "w") as trace_file:
+            json.dump({"traceEvents": list(self.trace_events), "displayTimeUnit": "ms"}, trace_file)
+
+
+# The profiler of the game
+profiler = FrameProfiler()
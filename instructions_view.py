@@ -0,0 +1,121 @@
+"""
+This script defines the instructions screen, the first view of the game.
+
+It only needs arcade and the image of the screen, so it is shown as soon as
+the window opens. The rest of the game, its modules included, is loaded by
+the preloader once the first frame is on screen.
+
+Developers: DemonCyborg, Taterstew, pillitoka, ballipilla
+"""
+
+import arcade
+
+import asset_registry
+import startup_profiler
+from preloader import Preloader
+
+# --- Loading bar of the instructions screen
+LOADING_BAR_HEIGHT = 6
+LOADING_BAR_COLOR = arcade.csscolor.WHITE
+
+
+class InstructionsView(arcade.View):
+    """Instruction View class."""
+
+    def __init__(self, screen_width, screen_height, sprite_size, record_path=None, replay_path=None,
+                 timestep=None):
+        """Initialize the class.
+
+        :param screen_width: screen width in pixels
+        :type screen_width: int
+        :param screen_height: screen height in pixels
+        :type screen_height: int
+        :param sprite_size: size of a sprite in pixels
+        :type sprite_size: int
+        :param record_path: file the inputs of the game are recorded to
+        :type record_path: str
+        :param replay_path: recording played back instead of the keyboard
+        :type replay_path: str
+        :param timestep: time advanced by each step of the game, the default of GameView if None
+        :type timestep: float
+        """
+        super().__init__()
+        self.screen_width = screen_width
+        self.screen_height = screen_height
+        self.sprite_size = sprite_size
+        self.record_path = record_path
+        self.replay_path = replay_path
+        self.timestep = timestep
+
+        # Loads the game while the instructions are shown
+        self.preloader: Preloader = None
+        self.game_view = None
+
+    def on_show(self):
+        """Show once when we run this view."""
+        # texture showing the game over screen
+        self.texture = asset_registry.load_texture("resources/images/screens/start_screen.png")
+
+        # Reset the viewport, necessary if we have a scrolling game
+        # to reset the viewport back to the start so we can see what we draw.
+        arcade.set_viewport(0, self.screen_width - 1, 0, self.screen_height - 1)
+
+        # The game is loaded in the background once the first frame is drawn
+        self.preloader = Preloader()
+
+    def create_game_view(self):
+        """Create the game, once the preloader loaded its assets."""
+        # already imported by the preloader
+        from game_view import GameView
+        self.game_view = GameView(self.screen_width, self.screen_height, self.sprite_size,
+                                  self.record_path, self.replay_path, timestep=self.timestep)
+
+    def on_update(self, delta_time):
+        """Set the game up a little more, between two frames.
+
+        :param delta_time: Time interval since the last time the function was called in seconds.
+        :type delta_time: float
+        """
+        if self.game_view is None and self.preloader.is_loaded:
+            self.create_game_view()
+        if self.game_view is not None:
+            self.preloader.update(self.game_view)
+
+    def on_draw(self):
+        """Draw this view."""
+        arcade.start_render()
+        self.texture.draw_sized(self.screen_width / 2, self.screen_height / 2,
+                                self.screen_width, self.screen_height)
+        # show how much of the game is loaded
+        if not self.preloader.is_ready:
+            arcade.draw_lrtb_rectangle_filled(0, self.screen_width * self.preloader.progress,
+                                              LOADING_BAR_HEIGHT, 0, LOADING_BAR_COLOR)
+        #arcade.draw_text("Instructions Screen", self.screen_width / 2, self.screen_height / 2,
+        #                 arcade.color.WHITE, font_size=50, anchor_x="center")
+        #arcade.draw_text("Press any key to start", self.screen_width / 2, self.screen_height / 2-75,
+        #                 arcade.color.WHITE, font_size=20, anchor_x="center")
+        #arcade.draw_text("Use arrow keys to move. Space to turn on the torch.", self.screen_width / 2, self.screen_height / 2-150,
+        #                 arcade.color.WHITE, font_size=20, anchor_x="center")
+
+        # Start loading once the first frame is drawn, so it does not slow it down
+        if not self.preloader.is_started:
+            startup_profiler.mark_first_frame()
+            self.preloader.start()
+
+    def on_key_press(self, key, modifiers):
+        """Handle a key press.
+
+        When any key is pressed this view switches to the main game.
+        :param key: The key that is pressed
+        :type key: int
+        :param modifiers: Bitwise 'and' of all modifiers (shift, ctrl, num lock)
+        pressed during this event. See :ref:`keyboard_modifiers`.
+        :type modifiers: int
+        """
+        # finish loading if the key was pressed too early
+        self.preloader.wait()
+        if self.game_view is None:
+            self.create_game_view()
+        self.preloader.finish(self.game_view)
+        self.game_view.start()
+        self.window.show_view(self.game_view)
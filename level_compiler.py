@@ -0,0 +1,436 @@
+"""
+This script compiles Tiled maps into binary level files and loads them.
+
+A compiled level holds, for every tile layer of the map, the position and
+texture of every tile as packed arrays, plus the image and collision polygon
+of every texture. Object layers are stored as lists of points. Layers such
+as owls, cats, racoon and game_end_marker double as spawn tables.
+
+At runtime the level file is memory-mapped and read without any XML parsing.
+It is compiled again automatically when the map or one of its tilesets
+changes.
+
+Usage: python level_compiler.py <map.tmx> [<map.tmx> ...]
+
+Developers: DemonCyborg, Taterstew, pillitoka, ballipilla
+"""
+
+import os
+import sys
+import math
+import json
+import mmap
+import zlib
+import gzip
+import base64
+import struct
+import xml.etree.ElementTree as ElementTree
+from array import array
+
+import arcade
+
+import asset_registry
+
+# --- File format
+MAGIC = b"RCLV"
+VERSION = 1
+# magic, version, length of the metadata
+HEADER_FORMAT = "<4sII"
+# Extension of compiled levels, they are written next to their map
+LEVEL_EXTENSION = ".lvl"
+
+# Tiled stores flip flags in the high bits of the tile ids
+GID_MASK = 0x1FFFFFFF
+
+# Number of points used for elliptic collision shapes, as arcade does
+ELLIPSE_STEPS = 8
+
+
+def _read_tileset(element, directory, tilesets, dependencies):
+    """Read a tileset, either inline in the map or in an external .tsx file.
+
+    :param element: <tileset> element of the map
+    :param directory: folder of the file containing the element
+    :param tilesets: list of (firstgid, tiles) to add the tileset to
+    :param dependencies: list of source files to add the .tsx file to
+    """
+    first_gid = int(element.get("firstgid"))
+    source = element.get("source")
+    if source is not None:
+        tsx_path = os.path.normpath(os.path.join(directory, source))
+        dependencies.append(tsx_path)
+        element = ElementTree.parse(tsx_path).getroot()
+        directory = os.path.dirname(tsx_path)
+
+    tiles = {}
+    for tile in element.findall("tile"):
+        image = tile.find("image")
+        if image is None:
+            continue
+        tiles[int(tile.get("id"))] = (os.path.normpath(os.path.join(directory, image.get("source"))),
+                                      int(image.get("width")),
+                                      int(image.get("height")),
+                                      tile.find("objectgroup"))
+    tilesets.append((first_gid, tiles))
+
+
+def _hit_box_from_objects(objectgroup, width, height):
+    """Compute the hit box of a tile from its collision objects.
+
+    Points are relative to the center of the tile, with y pointing up, in the
+    same way arcade.tilemap computes them.
+
+    :return: list of points, None if the tile has no collision object
+    """
+    if objectgroup is None:
+        return None
+    hitbox = objectgroup.find("object")
+    if hitbox is None:
+        return None
+
+    x = float(hitbox.get("x", 0))
+    y = float(hitbox.get("y", 0))
+    points = []
+    polygon = hitbox.find("polygon")
+    if polygon is None:
+        polygon = hitbox.find("polyline")
+
+    if polygon is not None:
+        for point in polygon.get("points").split():
+            px, py = (float(value) for value in point.split(","))
+            points.append((px + x - width / 2, -(py + y - height / 2)))
+        # a closed polyline repeats its first point
+        if len(points) > 1 and points[0] == points[-1]:
+            points.pop()
+    elif hitbox.find("ellipse") is not None:
+        half_width = float(hitbox.get("width")) / 2
+        half_height = float(hitbox.get("height")) / 2
+        center_x = x + half_width - width / 2
+        center_y = y + half_height - height / 2
+        for step in range(ELLIPSE_STEPS):
+            angle = step / ELLIPSE_STEPS * 2 * math.pi
+            points.append((half_width * math.cos(angle) + center_x,
+                           -(half_height * math.sin(angle) + center_y)))
+    else:
+        start_x = x - width / 2
+        start_y = -(y - height / 2)
+        end_x = x + float(hitbox.get("width")) - width / 2
+        end_y = -(y + float(hitbox.get("height")) - height / 2)
+        points = [(start_x, start_y), (end_x, start_y), (end_x, end_y), (start_x, end_y)]
+    return points
+
+
+def _read_layer_data(layer):
+    """Return the tile ids of a tile layer, row by row from the top.
+
+    :param layer: <layer> element of the map
+    :return: list of tile ids, 0 for empty cells
+    """
+    data = layer.find("data")
+    encoding = data.get("encoding")
+    if encoding == "csv":
+        return [int(value) for value in data.text.replace("\n", "").split(",") if value.strip()]
+    if encoding != "base64":
+        return [int(tile.get("gid", 0)) for tile in data.findall("tile")]
+
+    raw = base64.b64decode(data.text.strip())
+    compression = data.get("compression")
+    if compression == "zlib":
+        raw = zlib.decompress(raw)
+    elif compression == "gzip":
+        raw = gzip.decompress(raw)
+    elif compression is not None:
+        raise ValueError(f"Unsupported layer compression: {compression}")
+    return list(struct.unpack(f"<{len(raw) // 4}I", raw))
+
+
+def build_level_data(tmx_path):
+    """Compile a Tiled map into the bytes of a level file.
+
+    :param tmx_path: path of the .tmx map
+    :type tmx_path: str
+    :return: content of the compiled level
+    :rtype: bytes
+    """
+    tmx_path = os.path.normpath(tmx_path)
+    directory = os.path.dirname(tmx_path)
+    root = ElementTree.parse(tmx_path).getroot()
+
+    map_width = int(root.get("width"))
+    map_height = int(root.get("height"))
+    tile_width = int(root.get("tilewidth"))
+    tile_height = int(root.get("tileheight"))
+
+    dependencies = [tmx_path]
+    tilesets = []
+    for element in root.findall("tileset"):
+        _read_tileset(element, directory, tilesets, dependencies)
+    tilesets.sort(key=lambda tileset: tileset[0], reverse=True)
+
+    # gid -> texture id, filled as the layers use the tiles
+    texture_ids = {}
+    textures = []
+    hit_box_data = array("f")
+
+    def texture_id_for(gid):
+        if gid in texture_ids:
+            return texture_ids[gid]
+        for first_gid, tiles in tilesets:
+            if gid >= first_gid:
+                break
+        else:
+            raise ValueError(f"Tile {gid} of {tmx_path} is not in any tileset")
+        image_path, width, height, objectgroup = tiles[gid - first_gid]
+        points = _hit_box_from_objects(objectgroup, width, height)
+        if points is None:
+            points = asset_registry.load_texture(image_path).hit_box_points
+        textures.append({"path": image_path.replace(os.sep, "/"),
+                         "width": width,
+                         "height": height,
+                         "hit_box": [len(hit_box_data), len(points)]})
+        for point in points:
+            hit_box_data.extend(point)
+        texture_ids[gid] = len(textures) - 1
+        return texture_ids[gid]
+
+    layers = {}
+    arrays = []
+    for layer in root.findall("layer"):
+        xs = array("f")
+        ys = array("f")
+        ids = array("I")
+        for index, gid in enumerate(_read_layer_data(layer)):
+            gid &= GID_MASK
+            if gid == 0:
+                continue
+            texture_id = texture_id_for(gid)
+            texture = textures[texture_id]
+            column = index % map_width
+            row = index // map_width
+            xs.append(column * tile_width + texture["width"] / 2)
+            ys.append((map_height - row - 1) * tile_height + texture["height"] / 2)
+            ids.append(texture_id)
+        layers[layer.get("name")] = {"count": len(ids)}
+        arrays.append((layer.get("name"), xs, ys, ids))
+
+    objects = {}
+    for group in root.findall("objectgroup"):
+        points = []
+        for element in group.findall("object"):
+            # tiled measures y from the top of the map
+            points.append((float(element.get("x", 0)),
+                           map_height * tile_height - float(element.get("y", 0))))
+        objects[group.get("name")] = points
+
+    # lay out the packed arrays after the metadata
+    offset = 0
+    for name, xs, ys, ids in arrays:
+        layers[name]["offset"] = offset
+        offset += 12 * len(ids)
+    hit_box_offset = offset
+
+    stat_dependencies = []
+    for path in dependencies:
+        stat = os.stat(path)
+        stat_dependencies.append([path.replace(os.sep, "/"), stat.st_mtime_ns, stat.st_size])
+
+    metadata = {
+        "map_size": [map_width, map_height],
+        "tile_size": [tile_width, tile_height],
+        "dependencies": stat_dependencies,
+        "textures": textures,
+        "layers": layers,
+        "objects": objects,
+        "hit_box_offset": hit_box_offset,
+        "hit_box_count": len(hit_box_data),
+    }
+    metadata_bytes = json.dumps(metadata, separators=(",", ":")).encode("utf-8")
+    # keep the packed arrays aligned to 4 bytes
+    metadata_bytes += b" " * (-len(metadata_bytes) % 4)
+
+    chunks = [struct.pack(HEADER_FORMAT, MAGIC, VERSION, len(metadata_bytes)), metadata_bytes]
+    for name, xs, ys, ids in arrays:
+        chunks.extend((xs.tobytes(), ys.tobytes(), ids.tobytes()))
+    chunks.append(hit_box_data.tobytes())
+    return b"".join(chunks)
+
+
+def compile_level(tmx_path, level_path=None):
+    """Compile a Tiled map and write the level file.
+
+    :param tmx_path: path of the .tmx map
+    :type tmx_path: str
+    :param level_path: path of the level file, next to the map if None
+    :type level_path: str
+    :return: path of the level file
+    :rtype: str
+    """
+    if level_path is None:
+        level_path = os.path.splitext(tmx_path)[0] + LEVEL_EXTENSION
+    data = build_level_data(tmx_path)
+    # write to a temporary file first, so a half written level is never loaded
+    temporary_path = level_path + ".tmp"
+    with open(temporary_path, "wb") as level_file:
+        level_file.write(data)
+    os.replace(temporary_path, level_path)
+    return level_path
+
+
+class CompiledLevel:
+    """Level read from a compiled level file."""
+
+    def __init__(self, buffer):
+        """Initialize the class.
+
+        :param buffer: content of the level file, usually memory-mapped
+        :type buffer: mmap.mmap or bytes
+        """
+        self.buffer = buffer
+        magic, version, metadata_length = struct.unpack_from(HEADER_FORMAT, buffer, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("Not a level file of this version")
+
+        start = struct.calcsize(HEADER_FORMAT)
+        metadata = json.loads(bytes(buffer[start:start + metadata_length]).decode("utf-8"))
+        self.data_start = start + metadata_length
+
+        self.map_size = tuple(metadata["map_size"])
+        self.tile_size = tuple(metadata["tile_size"])
+        self.dependencies = metadata["dependencies"]
+        self.textures = metadata["textures"]
+        self.layers = metadata["layers"]
+        self.objects = metadata["objects"]
+
+        hit_box_data = self._view(metadata["hit_box_offset"], metadata["hit_box_count"], "f")
+        self.hit_boxes = []
+        for texture in self.textures:
+            offset, count = texture["hit_box"]
+            self.hit_boxes.append(tuple((hit_box_data[offset + 2 * i], hit_box_data[offset + 2 * i + 1])
+                                        for i in range(count)))
+
+    def _view(self, offset, count, type_code):
+        """Return a typed view over a packed array of the level file."""
+        start = self.data_start + offset
+        return memoryview(self.buffer)[start:start + 4 * count].cast(type_code)
+
+    def is_stale(self):
+        """Return True if the map or a tileset changed since the level was compiled."""
+        for path, mtime_ns, size in self.dependencies:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                return True
+            if stat.st_mtime_ns != mtime_ns or stat.st_size != size:
+                return True
+        return False
+
+    def layer_arrays(self, layer_name):
+        """Return the packed x, y and texture id arrays of a tile layer.
+
+        :param layer_name: name of the layer
+        :type layer_name: str
+        :return: x positions, y positions and texture ids, unscaled
+        :rtype: tuple
+        """
+        layer = self.layers[layer_name]
+        count = layer["count"]
+        offset = layer["offset"]
+        return (self._view(offset, count, "f"),
+                self._view(offset + 4 * count, count, "f"),
+                self._view(offset + 8 * count, count, "I"))
+
+    def positions(self, layer_name, scaling=1.0):
+        """Return the position of every tile of a layer, used as spawn points.
+
+        :param layer_name: name of the layer
+        :type layer_name: str
+        :param scaling: scaling of the tiles
+        :type scaling: float
+        :return: list of (x, y) positions
+        :rtype: list
+        """
+        xs, ys, _ = self.layer_arrays(layer_name)
+        return [(x * scaling, y * scaling) for x, y in zip(xs, ys)]
+
+    def sprite_list(self, layer_name, scaling=1.0, use_spatial_hash=None):
+        """Build the sprites of a tile layer.
+
+        Textures come from the asset registry, so each image is decoded once.
+
+        :param layer_name: name of the layer
+        :type layer_name: str
+        :param scaling: scaling of the tiles
+        :type scaling: float
+        :param use_spatial_hash: passed to the sprite list
+        :type use_spatial_hash: bool
+        :return: the sprites of the layer
+        :rtype: arcade.SpriteList
+        """
+        sprite_list = arcade.SpriteList(use_spatial_hash=use_spatial_hash)
+        xs, ys, texture_ids = self.layer_arrays(layer_name)
+        for x, y, texture_id in zip(xs, ys, texture_ids):
+            sprite = arcade.Sprite(scale=scaling)
+            sprite.texture = asset_registry.load_texture(self.textures[texture_id]["path"])
+            # unscaled, like arcade.tilemap, the scale of the sprite is applied to it
+            sprite.hit_box = self.hit_boxes[texture_id]
+            sprite.position = (x * scaling, y * scaling)
+            sprite_list.append(sprite)
+        return sprite_list
+
+    def close(self):
+        """Release the memory-mapped file."""
+        if isinstance(self.buffer, mmap.mmap):
+            self.buffer.close()
+
+
+def _open_level(level_path):
+    """Memory-map a level file.
+
+    :return: the level, None if the file is missing or not a valid level
+    """
+    try:
+        with open(level_path, "rb") as level_file:
+            buffer = mmap.mmap(level_file.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    try:
+        return CompiledLevel(buffer)
+    except (ValueError, struct.error):
+        buffer.close()
+        return None
+
+
+def load_level(tmx_path):
+    """Load the compiled version of a map, compiling it first if needed.
+
+    The level is compiled again if the map or one of its tilesets changed.
+    When the level file cannot be written (e.g. in a frozen build), the map is
+    compiled in memory.
+
+    :param tmx_path: path of the .tmx map
+    :type tmx_path: str
+    :return: the level
+    :rtype: CompiledLevel
+    """
+    level_path = os.path.splitext(tmx_path)[0] + LEVEL_EXTENSION
+    level = _open_level(level_path)
+    if level is not None:
+        if not level.is_stale():
+            return level
+        level.close()
+
+    try:
+        compile_level(tmx_path, level_path)
+    except OSError:
+        return CompiledLevel(build_level_data(tmx_path))
+    return _open_level(level_path)
+
+
+def main():
+    """Call main function."""
+    for tmx_path in sys.argv[1:]:
+        print(compile_level(tmx_path))
+
+
+if __name__ == "__main__":
+    main()
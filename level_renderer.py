@@ -0,0 +1,215 @@
+"""
+This script defines the drawing of the scrolling level.
+
+The level is split into chunks of a fixed width along x, each with its own
+sprite list. Only the chunks that overlap the viewport are drawn, so the
+number of draw calls and vertices uploaded each frame depends on the width
+of the screen, not on the length of the level. The enemies are culled with
+the grid columns of their activation window instead. The decorative layers
+are pre-rendered into images.
+
+Developers: DemonCyborg, Taterstew, pillitoka, ballipilla
+"""
+
+import math
+
+import arcade
+
+from baked_background import BakedLayer
+
+# Width of a chunk of the level, in pixels
+CHUNK_WIDTH = 1024
+
+# Decorative layers of the map, back to front, and how fast they scroll compared with the camera.
+# Consecutive layers with the same factor are baked into the same images.
+BACKGROUND_LAYERS = (
+    ("sky", 1.0),
+    ("bkg_back", 1.0),
+    ("bkg_front", 1.0),
+)
+
+
+def build_background(level, scaling):
+    """Bake the decorative layers of a level into images, grouped by parallax factor.
+
+    Nothing is drawn, so it can run on a worker thread.
+
+    :param level: the compiled level
+    :type level: level_compiler.CompiledLevel
+    :param scaling: scaling of the tiles
+    :type scaling: float
+    :return: the baked layers, back to front
+    :rtype: list
+    """
+    background_layers = []
+    sprite_lists = []
+    for index, (layer_name, parallax) in enumerate(BACKGROUND_LAYERS):
+        sprite_lists.append(level.sprite_list(layer_name, scaling))
+        if index + 1 == len(BACKGROUND_LAYERS) or BACKGROUND_LAYERS[index + 1][1] != parallax:
+            background_layers.append(BakedLayer(sprite_lists, parallax))
+            sprite_lists = []
+    return background_layers
+
+
+class ChunkedLayer:
+    """Sprites that do not move, split into chunks along x."""
+
+    def __init__(self, sprites, is_static=True, chunk_width=CHUNK_WIDTH):
+        """Initialize the class.
+
+        :param sprites: sprites of the layer
+        :type sprites: arcade.SpriteList
+        :param is_static: True if no sprite is ever removed from the layer or changed
+        :type is_static: bool
+        :param chunk_width: width of a chunk in pixels
+        :type chunk_width: float
+        """
+        self.chunk_width = chunk_width
+        # chunk index -> sprite list
+        self.chunks = {}
+        # sprites are put in a chunk by their center, look this far for the ones sticking out
+        self.overhang = 0
+
+        for sprite in sprites:
+            index = math.floor(sprite.center_x / chunk_width)
+            chunk = self.chunks.get(index)
+            if chunk is None:
+                chunk = arcade.SpriteList(is_static=is_static)
+                self.chunks[index] = chunk
+            chunk.append(sprite)
+            self.overhang = max(self.overhang, sprite.width / 2)
+
+    def uploads(self, target):
+        """Draw each chunk once, which uploads it to the GPU, yielding after each one.
+
+        :param target: offscreen target drawn into, like a light layer
+        """
+        for chunk in self.chunks.values():
+            with target:
+                chunk.draw()
+            yield
+
+    def draw(self, left, right):
+        """Draw the chunks that overlap a range of x.
+
+        :param left: left of the viewport
+        :type left: float
+        :param right: right of the viewport
+        :type right: float
+        """
+        first = math.floor((left - self.overhang) / self.chunk_width)
+        last = math.floor((right + self.overhang) / self.chunk_width)
+        for index in range(first, last + 1):
+            chunk = self.chunks.get(index)
+            if chunk is not None:
+                chunk.draw()
+
+
+class CulledLayer:
+    """Sprites that move, found with the grid of their activation window.
+
+    Only the sprites in the columns of the grid overlapping the viewport are kept in the list that is
+    drawn, and only the ones entering or leaving those columns are added or removed.
+    """
+
+    def __init__(self, window):
+        """Initialize the class.
+
+        :param window: activation window of the sprites, its grid follows them as they move
+        :type window: spatial_index.ActivationWindow
+        """
+        self.window = window
+        self.visible = arcade.SpriteList()
+        # ids of the sprites in the visible list
+        self.shown_ids = set()
+        # sprites are indexed by their center, look this far for the ones sticking out
+        self.overhang = max((sprite.width / 2 for sprite in window.sprites), default=0)
+
+    def draw(self, left, right):
+        """Draw the sprites in the columns that overlap a range of x.
+
+        :param left: left of the viewport
+        :type left: float
+        :param right: right of the viewport
+        :type right: float
+        """
+        ids = self.window.grid.query(left - self.overhang, right + self.overhang)
+        if ids != self.shown_ids:
+            sprites = self.window.sprites
+            for index in self.shown_ids - ids:
+                self.visible.remove(sprites[index])
+            for index in ids - self.shown_ids:
+                self.visible.append(sprites[index])
+            self.shown_ids = ids
+        self.visible.draw()
+
+
+class LevelRenderer:
+    """Draws the layers of the level and the sprites of the game, back to front."""
+
+    def __init__(self, level, simulation, scaling, screen_width, background_layers=None):
+        """Initialize the class and split the layers of the level into chunks.
+
+        :param level: the compiled level
+        :type level: level_compiler.CompiledLevel
+        :param simulation: the game, already set up
+        :type simulation: GameSimulation
+        :param scaling: scaling of the tiles
+        :type scaling: float
+        :param screen_width: screen width in pixels
+        :type screen_width: int
+        :param background_layers: decorative layers already baked by build_background(), baked here if None
+        :type background_layers: list
+        """
+        self.simulation = simulation
+        self.screen_width = screen_width
+
+        # Decorative layers, drawn but they do not take part in the game. They are baked into
+        # images once, grouped by parallax factor.
+        if background_layers is None:
+            background_layers = build_background(level, scaling)
+        self.background_layers = background_layers
+
+        # Layers of the game that do not move. Eaten items are made transparent.
+        self.stage_layer = ChunkedLayer(simulation.stage_list)
+        self.items_layer = ChunkedLayer(simulation.items_list, is_static=False)
+
+        # Layers of the game that move, culled with the grids of the activation windows.
+        # The bubblegums near the player and the boss are few, they are drawn like the player.
+        self.owl_layer = CulledLayer(simulation.owl_window)
+        self.cat_layer = CulledLayer(simulation.cat_window)
+        self.racoon_layer = CulledLayer(simulation.racoon_window)
+
+    def uploads(self, target):
+        """Draw each part of the level once into an offscreen target, yielding after each one.
+
+        Drawing uploads the sprites and images to the GPU, so the first frames of the game do not stall.
+
+        :param target: offscreen target drawn into, like a light layer
+        """
+        for layer in self.background_layers:
+            for _ in layer.uploads(target):
+                yield
+        for layer in (self.stage_layer, self.items_layer):
+            for _ in layer.uploads(target):
+                yield
+
+    def draw(self, left):
+        """Draw the part of the level in the viewport.
+
+        :param left: left of the viewport
+        :type left: float
+        """
+        right = left + self.screen_width
+
+        for layer in self.background_layers:
+            layer.draw(left, right)
+        self.stage_layer.draw(left, right)
+        self.items_layer.draw(left, right)
+        self.simulation.player_list.draw()
+        self.simulation.bullet_list.draw()
+        self.owl_layer.draw(left, right)
+        self.cat_layer.draw(left, right)
+        self.racoon_layer.draw(left, right)
+        self.simulation.racoon_boss_list.draw()
+        self.simulation.timer_bar_list.draw()
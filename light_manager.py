@@ -0,0 +1,80 @@
+"""
+This script defines the lights of the level, like the street lamps.
+
+The lights are points of the "lights" object layer of the map. There can be
+hundreds of them along the level, but the light layer packs every light it
+holds into its buffer each time the set of lights changes, and lights all
+of them on every frame. So only the lights within reach of the viewport are
+kept in it: the lights are indexed along x, and each frame the lights that
+came into reach are added and the ones that left are removed, all at once.
+When the viewport stays within the same columns nothing changes.
+
+Developers: DemonCyborg, Taterstew, pillitoka, ballipilla
+"""
+
+import arcade
+from arcade.experimental.lights import Light
+
+from spatial_index import XGrid, CELL_SIZE
+
+# Name of the object layer of the map holding the lights
+LIGHTS_LAYER = "lights"
+
+# Look of the light of a street lamp
+LAMP_RADIUS = 300
+LAMP_COLOR = arcade.csscolor.LIGHT_YELLOW
+LAMP_MODE = 'soft'
+
+
+class LightManager:
+    """Holds every light of the level and keeps the ones near the viewport in the light layer."""
+
+    def __init__(self, light_layer, positions, radius=LAMP_RADIUS, color=LAMP_COLOR, mode=LAMP_MODE,
+                 cell_size=CELL_SIZE):
+        """Initialize the class.
+
+        :param light_layer: light layer the lights are drawn with
+        :type light_layer: arcade.experimental.lights.LightLayer
+        :param positions: (x, y) of each light
+        :type positions: list
+        :param radius: radius of the lights
+        :type radius: float
+        :param color: color of the lights
+        :type color: tuple
+        :param mode: 'soft' or 'hard'
+        :type mode: str
+        :param cell_size: width of a column of the index, in pixels
+        :type cell_size: float
+        """
+        self.light_layer = light_layer
+        self.radius = radius
+        self.lights = [Light(x, y, radius, color, mode) for x, y in positions]
+
+        self.grid = XGrid(cell_size)
+        for index, light in enumerate(self.lights):
+            self.grid.insert(index, light.position[0])
+
+        # indices of the lights in the light layer
+        self.visible_ids = set()
+
+    def update(self, left, right):
+        """Put the lights within reach of the viewport in the light layer, and take the others out.
+
+        :param left: left of the viewport
+        :type left: float
+        :param right: right of the viewport
+        :type right: float
+        """
+        visible_ids = self.grid.query(left - self.radius, right + self.radius)
+        if visible_ids == self.visible_ids:
+            return
+        for index in self.visible_ids - visible_ids:
+            self.light_layer.remove(self.lights[index])
+        self.light_layer.extend([self.lights[index] for index in visible_ids - self.visible_ids])
+        self.visible_ids = visible_ids
+
+    def reset(self):
+        """Take every light out of the light layer."""
+        for index in self.visible_ids:
+            self.light_layer.remove(self.lights[index])
+        self.visible_ids = set()
@@ -7,19 +7,36 @@ Developers: DemonCyborg, Taterstew, pillitoka, ballipilla
 import os
 import arcade
 
-# --- Animation constants.
-# Close enough to not-moving to have the animation go to idle.
-DEAD_ZONE = 0.05
+import asset_registry
 
-# Constants used to track if the player is facing left or right
-RIGHT_FACING = 0
-LEFT_FACING = 1
+# --- Attack constants. They are in seconds, so they do not change with the tick rate.
+# Time an owl flies towards the player before it stops (100 steps at 60 steps per second)
+ATTACK_TIME = 100 / 60
+# Time between two times a stopped owl is stopped again
+ATTACK_PAUSE_TIME = 5 / 60
+# Speed of an attacking owl, in pixels per second
+ATTACK_SPEED = 120
+
+
+def owl_fields():
+    """Return the columns of the state of the owls, for an EntityStore."""
+    return {
+        # Has the owl started attacking?
+        "is_attacking": (bool, False),
+        # Time left before the owl stops, in seconds
+        "attack_time": (float, ATTACK_TIME),
+    }
 
-# How many pixels to move before we change the texture in the walking animation
-DISTANCE_TO_CHANGE_TEXTURE = 20
 
 class OwlSprite(arcade.Sprite):
-    """Class for Owl."""
+    """Class for Owl.
+
+    The state of the owls is kept in an EntityStore, the sprite only draws the owl.
+    """
+
+    # Textures shared by every owl
+    idle_texture = None
+    fly_texture = None
 
     def __init__(self, scale):
         """Initialize the class."""
@@ -29,54 +46,61 @@ class OwlSprite(arcade.Sprite):
         # Set our scale
         self.scale = scale
 
-        # Load textures 
+        # Load textures, once for every owl
         resource_path = "resources/images/owl"
-        self.idle_texture = arcade.load_texture(os.path.join(resource_path, "owl_idle.png"))
-        self.fly_texture = arcade.load_texture(os.path.join(resource_path, "owl_fly.png"))
+        if OwlSprite.idle_texture is None:
+            OwlSprite.idle_texture = asset_registry.load_texture(os.path.join(resource_path, "owl_idle.png"))
+            OwlSprite.fly_texture = asset_registry.load_texture(os.path.join(resource_path, "owl_fly.png"))
 
         # Set the initial texture
         self.texture = self.idle_texture
 
         # Hit box will be set based on the first image used.
-        self.hit_box = self.texture.hit_box_points
-
-        # Default to face-right
-        self.character_face_direction = RIGHT_FACING
+        self.hit_box = asset_registry.load_hit_box(os.path.join(resource_path, "owl_idle.png"))
 
-        # Index of our current texture
-        self.cur_texture = 0
+    def reset(self):
+        """Restore the look the owl had when it was created."""
+        self.texture = self.idle_texture
 
-        # Is the sprite cloe to the player?
-        self.is_close_to_player = False
 
-        # Has the owl started attacking?
-        self.is_attacking = False
-        self.attack_steps = 100
-
-        self.owl_flying_sound: arcade.Sound = arcade.load_sound("resources/sounds/owlflying.wav")
-    
-    def attack_player(self, player, physics_engine, delta_time):
-
-        if self.is_attacking is False:
-            self.is_attacking = True
-            self.texture = self.fly_texture
-            attack_direction = player.position - self.position
-            attack_direction = attack_direction / arcade.get_distance_between_sprites(self,player)
-            self.change_x = attack_direction[0] * 2
-            self.change_y = attack_direction[1] * 2
-            velocity = (self.change_x*1/delta_time, self.change_y*1/delta_time)
-            physics_engine.set_velocity(self,velocity)
-            #print("i am attacking player at", player.position)
-        self.attack_steps -= 1
-        #print("attack steps {}, velocity {}".format(self.attack_steps, self.velocity))
-        if self.attack_steps < 0:
-            #self.is_attacking = False
-            self.attack_steps = 5
-            self.change_x = 0
-            self.change_y = 0
-            velocity = (self.change_x*1/delta_time, self.change_y*1/delta_time)
-            physics_engine.set_velocity(self,velocity)
-            #arcade.play_sound(self.owl_flying_sound)
-            
-
-        
+def update_owls(store, indices, player, physics_engine, attack_distance, delta_time):
+    """Make the owls close to the player fly towards it, then stop.
+
+    :param store: state of the owls
+    :type store: EntityStore
+    :param indices: rows of the owls to update, the awake ones
+    :type indices: list
+    :param player: the player
+    :type player: PlayerSprite
+    :param physics_engine: The physics engine
+    :type physics_engine: arcade.PymunkPhysicsEngine
+    :param attack_distance: owls closer than this to the player attack it
+    :type attack_distance: float
+    :param delta_time: Time interval since the last update in seconds.
+    :type delta_time: float
+    """
+    if not indices:
+        return
+    indices, dx, dy, distance = store.near(indices, player, attack_distance)
+    if not len(indices):
+        return
+    is_attacking = store["is_attacking"]
+    attack_time = store["attack_time"]
+    owls = store.sprites
+
+    # owls that start attacking fly towards the player
+    starting = ~is_attacking[indices]
+    velocity_x = (dx / distance * ATTACK_SPEED)[starting].tolist()
+    velocity_y = (dy / distance * ATTACK_SPEED)[starting].tolist()
+    for index, velocity in zip(indices[starting].tolist(), zip(velocity_x, velocity_y)):
+        owls[index].texture = owls[index].fly_texture
+        physics_engine.set_velocity(owls[index], velocity)
+    is_attacking[indices] = True
+
+    # owls that flew long enough stop
+    attack_time[indices] -= delta_time
+    stopping = indices[attack_time[indices] < 0]
+    attack_time[stopping] = ATTACK_PAUSE_TIME
+    for index in stopping.tolist():
+        physics_engine.set_velocity(owls[index], (0, 0))
+        #sound_bank.play("owl_flying")
@@ -0,0 +1,64 @@
+"""
+This script defines the index of the items the player can pick up, like the donuts.
+
+Items never move, so they are not in the physics engine. They are sorted
+along x once, and each step only the few items around the player are
+tested for overlap, with a binary search, however many items the level has.
+An eaten item is only made transparent and marked as taken. It stays in its
+sprite lists, so nothing is removed from a list while the game runs and
+putting the items back is just as cheap.
+
+Developers: DemonCyborg, Taterstew, pillitoka, ballipilla
+"""
+
+from bisect import bisect_left, bisect_right
+
+import arcade
+
+# Alpha of an item that is shown, and of one that was taken
+SHOWN_ALPHA = 255
+TAKEN_ALPHA = 0
+
+
+class PickupIndex:
+    """Items sorted along x, picked up when a sprite overlaps them."""
+
+    def __init__(self, items):
+        """Initialize the class.
+
+        :param items: the items, they must not move
+        :type items: arcade.SpriteList
+        """
+        self.items = sorted(items, key=lambda item: item.center_x)
+        self.xs = [item.center_x for item in self.items]
+        # items are indexed by their center, look this far for the ones that stick out
+        self.overhang = max((item.width / 2 for item in self.items), default=0)
+        self.taken = [False] * len(self.items)
+
+    def collect(self, sprite):
+        """Take the items a sprite overlaps.
+
+        :param sprite: sprite picking the items up, the player
+        :type sprite: arcade.Sprite
+        :return: the items taken, usually none
+        :rtype: list
+        """
+        first = bisect_left(self.xs, sprite.left - self.overhang)
+        last = bisect_right(self.xs, sprite.right + self.overhang)
+        collected = []
+        for index in range(first, last):
+            if self.taken[index]:
+                continue
+            item = self.items[index]
+            if arcade.check_for_collision(sprite, item):
+                self.taken[index] = True
+                item.alpha = TAKEN_ALPHA
+                collected.append(item)
+        return collected
+
+    def reset(self):
+        """Put back every item that was taken."""
+        for index, item in enumerate(self.items):
+            if self.taken[index]:
+                self.taken[index] = False
+                item.alpha = SHOWN_ALPHA
@@ -0,0 +1,154 @@
+"""
+This script defines the preloading of the game while the instructions are shown.
+
+A worker thread imports the modules of the game, decodes the images and
+sounds, compiles and loads the map, and bakes the background. Then the main
+thread builds the game and uploads it to the GPU in small slices, a few
+milliseconds per frame, so the instructions screen stays responsive. When a
+key is pressed the game is ready, or the little that is left is finished at
+once.
+
+Developers: DemonCyborg, Taterstew, pillitoka, ballipilla
+"""
+
+import time
+import threading
+
+import asset_registry
+import sound_bank
+
+# Time the main thread can spend setting the game up in each frame, in seconds
+FRAME_BUDGET = 0.004
+
+# Share of the progress bar taken by the worker thread, the main thread does the rest
+WORKER_SHARE = 0.8
+
+
+class Preloader:
+    """Loads the assets of the game on a worker thread and sets the game up in slices."""
+
+    def __init__(self, map_name=None):
+        """Initialize the class.
+
+        :param map_name: path of the tiled map to load, the map of the game if None
+        :type map_name: str
+        """
+        self.map_name = map_name
+
+        # What is being loaded, and how much is done, from 0 to 1
+        self.status = "waiting"
+        self.progress = 0
+
+        # Assets loaded by the worker thread
+        self.level = None
+        self.background_layers = None
+        # Exception raised by the worker thread, raised again on the main thread
+        self.error = None
+
+        self.thread = threading.Thread(target=self._load, name="preloader", daemon=True)
+
+        # Stages left to set the game up on the main thread
+        self.stages = None
+        self.stage_count = 0
+        self.is_ready = False
+
+    def start(self):
+        """Start loading on the worker thread."""
+        self.thread.start()
+
+    def _load(self):
+        """Load the assets. Runs on the worker thread."""
+        try:
+            steps = (
+                ("modules", self._import_modules),
+                ("images", asset_registry.preload),
+                ("sounds", sound_bank.preload),
+                ("map", self._load_level),
+                ("tiles", self._load_tiles),
+                ("background", self._bake_background),
+            )
+            for index, (status, step) in enumerate(steps):
+                self.status = status
+                step()
+                self.progress = (index + 1) / len(steps) * WORKER_SHARE
+        except Exception as error:
+            self.error = error
+
+    def _import_modules(self):
+        # the game, with numpy and every sprite, is only imported here. Plain import
+        # statements, so the frozen build still finds the modules.
+        import game_view  # noqa: F401
+
+    def _load_level(self):
+        import level_compiler
+        from simulation import MAP_NAME
+        if self.map_name is None:
+            self.map_name = MAP_NAME
+        self.level = level_compiler.load_level(self.map_name)
+
+    def _load_tiles(self):
+        for texture in self.level.textures:
+            asset_registry.load_texture(texture["path"])
+
+    def _bake_background(self):
+        from level_renderer import build_background
+        from simulation import SPRITE_SCALING_TILES
+        self.background_layers = build_background(self.level, SPRITE_SCALING_TILES)
+
+    @property
+    def is_started(self):
+        """True once the worker thread was started."""
+        return self.thread.ident is not None
+
+    @property
+    def is_loaded(self):
+        """True once the worker thread is done."""
+        return self.is_started and not self.thread.is_alive()
+
+    def update(self, game_view, budget=FRAME_BUDGET):
+        """Set the game up for at most a time budget. Call once per frame on the main thread.
+
+        :param game_view: the game to set up
+        :type game_view: GameView
+        :param budget: time that can be spent, in seconds
+        :type budget: float
+        """
+        if self.is_ready or not self.is_loaded:
+            return
+        if self.error is not None:
+            raise self.error
+
+        if self.stages is None:
+            self.status = "level"
+            if game_view.map_name == self.map_name:
+                self.stages = game_view.setup_stages(self.level, self.background_layers)
+            else:
+                # the game plays another map, like the one of a replay, it loads its own
+                self.stages = game_view.setup_stages()
+
+        deadline = time.perf_counter() + budget
+        while time.perf_counter() < deadline:
+            if next(self.stages, StopIteration) is StopIteration:
+                self.is_ready = True
+                self.status = "ready"
+                self.progress = 1
+                return
+            self.stage_count += 1
+            # the number of stages is not known up front, get closer to the end with each one
+            self.progress = WORKER_SHARE + (1 - WORKER_SHARE) * (1 - 1 / (1 + self.stage_count / 10))
+
+    def wait(self):
+        """Wait for the worker thread to be done."""
+        if not self.is_started:
+            self.start()
+        self.thread.join()
+
+    def finish(self, game_view):
+        """Wait for the worker thread and set the game up completely.
+
+        :param game_view: the game to set up
+        :type game_view: GameView
+        """
+        self.wait()
+        while not self.is_ready:
+            self.update(game_view, budget=float("inf"))
@@ -0,0 +1,79 @@
+"""
+This script defines the patrol of the racoon minions.
+
+Each racoon walks back and forth around where it started. The state of the
+patrol (start, range, direction) is kept in the columns of the EntityStore
+of the racoons, so the forces and
+the changes of direction of every awake racoon are computed at once. Only
+the results are pushed to the physics engine: a force for each racoon that
+walks, and a new friction for the ones that started or stopped walking.
+
+Developers: DemonCyborg, Taterstew, pillitoka, ballipilla
+"""
+
+import numpy as np
+
+# Force pushing a racoon, it grows from the base force up to base + extra
+# the farther the racoon is from the end of its walk
+PATROL_BASE_FORCE = 4000
+PATROL_EXTRA_FORCE = 500
+
+# Friction of a racoon while it walks, and while it turns around
+WALKING_FRICTION = 0
+TURNING_FRICTION = 1.0
+
+
+class RacoonPatrol:
+    """Patrol controller of a list of racoons."""
+
+    def __init__(self, store, physics_engine):
+        """Initialize the class, and the patrol columns of the racoons from where they are.
+
+        :param store: state of the racoons, already added to the physics engine
+        :type store: EntityStore
+        :param physics_engine: The physics engine
+        :type physics_engine: arcade.PymunkPhysicsEngine
+        """
+        self.store = store
+        self.racoons = store.sprites
+        self.physics_engine = physics_engine
+
+        for index, racoon in enumerate(self.racoons):
+            store["start_x"][index] = racoon.center_x
+            store["friction"][index] = physics_engine.get_physics_object(racoon).shape.friction
+
+    def update(self, indices):
+        """Push the racoons towards the end of their walk, turn around the ones that reached it.
+
+        :param indices: indices of the racoons to update, the awake ones
+        :type indices: list
+        """
+        if not indices:
+            return
+        store = self.store
+        indices = np.asarray(indices, dtype=np.intp)
+        x = store.positions(indices)[0]
+        start_x = store["start_x"][indices]
+        max_delta_x = store["max_delta_x"][indices]
+        is_facing_right = store["is_facing_right"][indices]
+
+        # distance left to walk before turning around
+        distance = np.where(is_facing_right, start_x + max_delta_x - x, x - (start_x - max_delta_x))
+        is_walking = distance >= 0
+        force = distance / (2 * max_delta_x) * PATROL_EXTRA_FORCE + PATROL_BASE_FORCE
+        force = np.where(is_facing_right, force, -force)
+
+        # racoons that reached the end of their walk turn around and stop
+        turning = indices[~is_walking]
+        store["is_facing_right"][turning] = ~store["is_facing_right"][turning]
+
+        friction = np.where(is_walking, WALKING_FRICTION, TURNING_FRICTION)
+        changed = friction != store["friction"][indices]
+        store["friction"][indices] = friction
+
+        # push the results to the physics engine
+        racoons = self.racoons
+        for index, racoon_friction in zip(indices[changed].tolist(), friction[changed].tolist()):
+            self.physics_engine.set_friction(racoons[index], racoon_friction)
+        for index, racoon_force in zip(indices[is_walking].tolist(), force[is_walking].tolist()):
+            self.physics_engine.apply_force(racoons[index], (racoon_force, 0))
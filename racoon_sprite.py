@@ -7,17 +7,35 @@ Developers: DemonCyborg, Taterstew, pillitoka, ballipilla
 import os
 import arcade
 
-# --- Animation constants.
-# Close enough to not-moving to have the animation go to idle.
-DEAD_ZONE = 0.05
+import animation
+import asset_registry
+
+# --- Patrol constants.
+# How far the racoon walks on each side of where it started
+MAX_DELTA_X = 300
+
+
+def racoon_fields():
+    """Return the columns of the state of the racoons, for an EntityStore."""
+    return {
+        # Where the racoon started, and how far it walks on each side of it
+        "start_x": (float, 0.0),
+        "max_delta_x": (float, MAX_DELTA_X),
+        # Direction the racoon walks in
+        "is_facing_right": (bool, True),
+        # Friction of the body, as last set by the patrol
+        "friction": (float, 0.0),
+    }
 
-# How many pixels to move before we change the texture in the walking animation
-DISTANCE_TO_CHANGE_TEXTURE = 25
 
 class RacoonSprite(arcade.Sprite):
-    """Class for Racoon."""
+    """Class for Racoon.
 
-    def __init__(self, scale, starting_position):
+    The state of the racoons is kept in an EntityStore and their animation is run by a
+    SpriteAnimator, the sprite only draws the racoon.
+    """
+
+    def __init__(self, scale):
         """Initialize the class."""
         # Let parent initialize
         super().__init__()
@@ -25,75 +43,12 @@ class RacoonSprite(arcade.Sprite):
         # Set our scale
         self.scale = scale
 
-        # Load textures 
-        resource_path = "resources/images/racoon"
-        self.idle_texture = arcade.load_texture(os.path.join(resource_path, "racoon_0.png"))
-        self.fly_texture = arcade.load_texture(os.path.join(resource_path, "racoon_0.png"))
-
-        # Load textures for walking
-        self.walk_textures = []
-        self.num_walk_textures = 4
-        for i in range(self.num_walk_textures):
-            texture = arcade.load_texture_pair(os.path.join(resource_path, f"racoon_{i}.png"))
-            self.walk_textures.append(texture)
-
         # Set the initial texture
-        self.texture = self.idle_texture
+        resource_path = "resources/images/racoon"
+        self.texture = animation.load_character("racoon").idle_texture
 
         # Hit box will be set based on the first image used.
-        self.hit_box = self.texture.hit_box_points
-
-        # Default to face-right
-        self.is_facing_right = True
-
-        # Index of our current texture
-        self.cur_texture = 0
-
-        # save the starting position of the racoon
-        self.starting_position = starting_position
-
-        # max movement offset along x direction
-        self.max_delta_x = 300
+        self.hit_box = asset_registry.load_hit_box(os.path.join(resource_path, "racoon_0.png"))
 
         # max velocity
         self.pymunk.max_horizontal_velocity = 100
-
-        # How far have we traveled horizontally since changing the texture
-        self.x_odometer = 0
-
-    def pymunk_moved(self, physics_engine, dx, dy, d_angle):
-        """Handle being moved by the pymunk engine.
-
-        :param physics_engine: The physics engine
-        :type physics_engine: arcade.PymunkPhysicsEngine
-        :param dx: amount moved along x direction
-        :type dx: float
-        :param dy: amount moved along y direction
-        :type dy: float
-        :param d_angle: angle moved
-        :type d_angle: float
-        """
-
-        self.x_odometer += dx
-
-        if abs(self.x_odometer) > DISTANCE_TO_CHANGE_TEXTURE:
-
-            # Reset the odometer
-            self.x_odometer = 0
-
-            # Advance the walking animation
-            self.cur_texture += 1
-            if self.cur_texture >= self.num_walk_textures:
-                self.cur_texture = 0
-            if self.is_facing_right:
-                self.texture = self.walk_textures[self.cur_texture][0]
-            else:
-                self.texture = self.walk_textures[self.cur_texture][1]
-
-    def switch_texture(self):
-        if self.is_facing_right:
-            # switch to left texture
-            self.texture = self.walk_textures[self.cur_texture][1]
-        else:
-            # switch to right texture
-            self.texture = self.walk_textures[self.cur_texture][0]
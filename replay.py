@@ -0,0 +1,270 @@
+"""
+This script defines the recording and replaying of games.
+
+A recording holds the timestep, the random seed and the map of a game, every
+input of the player with the frame it was applied at, and checksums of the
+game state taken at regular intervals. Replaying it feeds the inputs back at
+the same frames with the same fixed timestep and checks the state against
+the checksums, which finds desyncs. Replays run headless, faster than real
+time, or inside GameView to watch them.
+
+Usage: python replay.py <recording> [<recording> ...]
+
+Developers: DemonCyborg, Taterstew, pillitoka, ballipilla
+"""
+
+import sys
+import time
+import zlib
+import random
+import struct
+
+import sound_bank
+from simulation import GameSimulation, PHYSICS_TIMESTEP
+
+# --- File format
+MAGIC = b"RCRP"
+VERSION = 1
+# magic, version, timestep, seed, number of frames, length of the map name
+HEADER_FORMAT = "<4sHdQIH"
+# frame, action, pressed
+EVENT_FORMAT = "<IBB"
+# frame, checksum
+CHECKSUM_FORMAT = "<II"
+# number of items that follow
+COUNT_FORMAT = "<I"
+
+# Number of frames between two checksums of the game state
+CHECKSUM_INTERVAL = 30
+
+
+def state_checksum(simulation):
+    """Return a checksum of the state of a game.
+
+    :param simulation: the game
+    :type simulation: GameSimulation
+    :return: checksum of the player position, the score and the elapsed time
+    :rtype: int
+    """
+    player = simulation.player_sprite
+    state = struct.pack("<ddqd", player.center_x, player.center_y, simulation.score,
+                        simulation.game_time_elapsed)
+    return zlib.crc32(state)
+
+
+class Recording:
+    """Inputs and checksums of a game."""
+
+    def __init__(self, map_name, timestep=PHYSICS_TIMESTEP, seed=0):
+        """Initialize the class.
+
+        :param map_name: path of the map that was played
+        :type map_name: str
+        :param timestep: simulated time of each step
+        :type timestep: float
+        :param seed: seed of the random generator
+        :type seed: int
+        """
+        self.map_name = map_name
+        self.timestep = timestep
+        self.seed = seed
+        # number of frames the game lasted
+        self.frame_count = 0
+        # list of (frame, action, pressed)
+        self.events = []
+        # list of (frame, checksum)
+        self.checksums = []
+
+    def save(self, path):
+        """Write the recording to a file.
+
+        :param path: path of the file
+        :type path: str
+        """
+        map_name = self.map_name.encode("utf-8")
+        chunks = [struct.pack(HEADER_FORMAT, MAGIC, VERSION, self.timestep, self.seed,
+                              self.frame_count, len(map_name)),
+                  map_name,
+                  struct.pack(COUNT_FORMAT, len(self.events))]
+        chunks.extend(struct.pack(EVENT_FORMAT, frame, action, pressed)
+                      for frame, action, pressed in self.events)
+        chunks.append(struct.pack(COUNT_FORMAT, len(self.checksums)))
+        chunks.extend(struct.pack(CHECKSUM_FORMAT, frame, checksum) for frame, checksum in self.checksums)
+        with open(path, "wb") as recording_file:
+            recording_file.write(b"".join(chunks))
+
+    @classmethod
+    def load(cls, path):
+        """Read a recording from a file.
+
+        :param path: path of the file
+        :type path: str
+        :return: the recording
+        :rtype: Recording
+        """
+        with open(path, "rb") as recording_file:
+            data = recording_file.read()
+
+        magic, version, timestep, seed, frame_count, name_length = struct.unpack_from(HEADER_FORMAT, data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a recording of this version")
+        offset = struct.calcsize(HEADER_FORMAT)
+        map_name = data[offset:offset + name_length].decode("utf-8")
+        offset += name_length
+
+        recording = cls(map_name, timestep, seed)
+        recording.frame_count = frame_count
+
+        count, = struct.unpack_from(COUNT_FORMAT, data, offset)
+        offset += struct.calcsize(COUNT_FORMAT)
+        for frame, action, pressed in struct.iter_unpack(EVENT_FORMAT,
+                                                         data[offset:offset + count * struct.calcsize(EVENT_FORMAT)]):
+            recording.events.append((frame, action, bool(pressed)))
+        offset += count * struct.calcsize(EVENT_FORMAT)
+
+        count, = struct.unpack_from(COUNT_FORMAT, data, offset)
+        offset += struct.calcsize(COUNT_FORMAT)
+        recording.checksums = list(struct.iter_unpack(CHECKSUM_FORMAT,
+                                                      data[offset:offset + count * struct.calcsize(CHECKSUM_FORMAT)]))
+        return recording
+
+
+class InputRecorder:
+    """Records the inputs of a game as it is played."""
+
+    def __init__(self, simulation, map_name, timestep=PHYSICS_TIMESTEP, seed=0):
+        """Initialize the class and seed the random generator.
+
+        :param simulation: the game, just set up or reset
+        :type simulation: GameSimulation
+        :param map_name: path of the map being played
+        :type map_name: str
+        :param timestep: simulated time of each step, the game must be stepped with it
+        :type timestep: float
+        :param seed: seed of the random generator
+        :type seed: int
+        """
+        self.simulation = simulation
+        self.recording = Recording(map_name, timestep, seed)
+        random.seed(seed)
+
+    def apply_input(self, action, pressed):
+        """Record an input and apply it to the game.
+
+        :param action: INPUT_LEFT, INPUT_RIGHT or INPUT_JUMP
+        :type action: int
+        :param pressed: True when the key is pressed, False when it is released
+        :type pressed: bool
+        """
+        self.recording.events.append((self.simulation.frame_count, action, pressed))
+        self.simulation.apply_input(action, pressed)
+
+    def after_step(self):
+        """Take a checksum of the game state if it is time to. Call after every step."""
+        frame = self.simulation.frame_count
+        self.recording.frame_count = frame
+        if frame % CHECKSUM_INTERVAL == 0:
+            self.recording.checksums.append((frame, state_checksum(self.simulation)))
+
+    def save(self, path):
+        """Write the recording to a file.
+
+        :param path: path of the file
+        :type path: str
+        """
+        self.recording.save(path)
+
+
+class ReplayDriver:
+    """Feeds the inputs of a recording back into a game, frame by frame."""
+
+    def __init__(self, recording, simulation):
+        """Initialize the class and seed the random generator.
+
+        :param recording: the recording to replay
+        :type recording: Recording
+        :param simulation: the game, just set up or reset on the map of the recording
+        :type simulation: GameSimulation
+        """
+        self.recording = recording
+        self.simulation = simulation
+        self.next_event = 0
+        self.checksums = dict(recording.checksums)
+        # list of (frame, expected checksum, actual checksum)
+        self.desyncs = []
+        random.seed(recording.seed)
+
+    @property
+    def is_finished(self):
+        """True once every recorded frame was replayed."""
+        return self.simulation.frame_count >= self.recording.frame_count
+
+    def before_step(self):
+        """Apply the inputs recorded for the next frame. Call before every step."""
+        events = self.recording.events
+        frame = self.simulation.frame_count
+        while self.next_event < len(events) and events[self.next_event][0] <= frame:
+            _, action, pressed = events[self.next_event]
+            self.simulation.apply_input(action, pressed)
+            self.next_event += 1
+
+    def after_step(self):
+        """Check the game state against the recording. Call after every step."""
+        frame = self.simulation.frame_count
+        expected = self.checksums.get(frame)
+        if expected is not None:
+            actual = state_checksum(self.simulation)
+            if actual != expected:
+                self.desyncs.append((frame, expected, actual))
+
+    def step(self):
+        """Replay one frame."""
+        self.before_step()
+        self.simulation.step(self.recording.timestep)
+        self.after_step()
+
+
+def replay_headless(recording, screen_width, screen_height, sprite_size, simulation=None):
+    """Replay a recording without a window, as fast as possible.
+
+    :param recording: the recording to replay
+    :type recording: Recording
+    :param simulation: a game set up on the map of the recording, reset before replaying. A new one if None
+    :type simulation: GameSimulation
+    :return: the driver, holding the desyncs found
+    :rtype: ReplayDriver
+    """
+    if simulation is None:
+        simulation = GameSimulation(screen_width, screen_height, sprite_size)
+        simulation.setup(recording.map_name)
+    else:
+        simulation.reset()
+
+    driver = ReplayDriver(recording, simulation)
+    while not driver.is_finished:
+        driver.step()
+    return driver
+
+
+def main():
+    """Call main function."""
+    from run_game import SCREEN_WIDTH, SCREEN_HEIGHT, SPRITE_SIZE
+
+    sound_bank.set_muted(True)
+    failed = False
+    for path in sys.argv[1:]:
+        recording = Recording.load(path)
+        start = time.perf_counter()
+        driver = replay_headless(recording, SCREEN_WIDTH, SCREEN_HEIGHT, SPRITE_SIZE)
+        duration = time.perf_counter() - start
+        simulated = recording.frame_count * recording.timestep
+        print(f"{path}: {recording.frame_count} frames ({simulated:.1f} s) replayed in {duration:.2f} s, "
+              f"outcome {driver.simulation.outcome}, score {driver.simulation.score}")
+        for frame, expected, actual in driver.desyncs:
+            failed = True
+            print(f"    desync at frame {frame}: expected checksum {expected:08x}, got {actual:08x}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,14 +3,18 @@ This is the code for the game Raccoon City developed for pyweek31.
 
 Developers: DemonCyborg, Taterstew, pillitoka, ballipilla
 """
+# imported first, it notes when the game started
+import startup_profiler
+
 import os
-import arcade
+import argparse
 
 import sys
 if getattr(sys, 'frozen', False) and hasattr(sys, '_MEIPASS'):
     os.chdir(sys._MEIPASS)
 
-from game_view import InstructionsView
+# arcade and the game are imported in main(), after the import timer is set up,
+# and most of the game is only imported by the preloader, once the window shows
 
 # Title of the game
 global SCREEN_TITLE
@@ -43,15 +47,43 @@ SCREEN_HEIGHT = SPRITE_SIZE * NUM_TILES_ALONG_HEIGHT    # 768
 
 def main():
     """Call main function."""
+    parser = argparse.ArgumentParser(description=SCREEN_TITLE)
+    parser.add_argument("--record", metavar="FILE", help="record the inputs of each game to FILE")
+    parser.add_argument("--replay", metavar="FILE", help="play back the inputs recorded in FILE")
+    parser.add_argument("--tick-rate", type=float, default=60, metavar="HZ",
+                        help="steps of the game per second, whatever the frame rate (default 60)")
+    parser.add_argument("--profile", action="store_true",
+                        help="time each frame and show the frame times on screen, F3 hides them")
+    parser.add_argument("--trace", metavar="FILE", help="profile and write a Chrome trace to FILE on exit")
+    parser.add_argument("--import-time", action="store_true",
+                        help="time each import and print them with the time to the first frame, like python -X importtime")
+    args = parser.parse_args()
+
+    if args.import_time:
+        startup_profiler.enable_import_timer()
+
+    import arcade
+    from instructions_view import InstructionsView
+    from frame_profiler import profiler
+
+    if args.profile or args.trace:
+        profiler.enable(show_overlay=args.profile)
+
     # instantiate a window for the game
     window = arcade.Window(SCREEN_WIDTH, SCREEN_HEIGHT, SCREEN_TITLE)
     # create the starting view
-    starting_view = InstructionsView(SCREEN_WIDTH, SCREEN_HEIGHT, SPRITE_SIZE)
+    starting_view = InstructionsView(SCREEN_WIDTH, SCREEN_HEIGHT, SPRITE_SIZE, args.record, args.replay,
+                                     timestep=1 / args.tick_rate)
     # show the view in the window
     window.show_view(starting_view)
     # run the game
     arcade.run()
 
+    if args.trace:
+        profiler.export_chrome_trace(args.trace)
+    if profiler.enabled:
+        print("\n".join(profiler.report()))
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,837 @@
+"""
+This script defines the simulation of the game.
+
+The simulation holds everything that makes the game run: the physics engine,
+the player, the enemies, the items, the bubblegums, the timer and the
+camera. It does not need a window, a GL context or audio, so it can also be
+run headless with a fixed timestep, much faster than real time.
+
+Usage: python simulation.py [simulated seconds]
+
+Developers: DemonCyborg, Taterstew, pillitoka, ballipilla
+"""
+
+import sys
+import time
+import itertools
+import arcade
+
+import asset_registry
+import sound_bank
+import level_compiler
+import stage_geometry
+from spatial_index import ActivationWindow
+from racoon_patrol import RacoonPatrol
+from entity_store import EntityStore
+from contact_cache import ContactCache
+from collision_events import CollisionEvents
+from pickup_index import PickupIndex
+from frame_profiler import profiler
+from player_sprite import PlayerSprite
+from owl_sprite import OwlSprite, owl_fields, update_owls
+from cat_sprite import CatSprite, cat_fields, update_cats
+from bubblegum_sprite import BubblegumPool
+from racoon_boss_sprite import RacoonBossSprite
+from racoon_sprite import RacoonSprite, racoon_fields
+from animation import SpriteAnimator
+
+# Scale sprites up or down
+SPRITE_SCALING_PLAYER = 1.0
+SPRITE_SCALING_TILES = 1.0
+
+# --- Physics forces. Higher number, faster accelerating.
+# Gravity
+GRAVITY = 1500
+
+# Damping - Factor of speed kept in 1 second
+DEFAULT_DAMPING = 1.0
+PLAYER_DAMPING = 0.4
+
+# Friction between objects, 0.0=ice, 1.0=rubber
+PLAYER_FRICTION = 1.0
+WALL_FRICTION = 0.7
+
+# Mass (defaults to 1)
+PLAYER_MASS = 2.0
+
+# Keep player from going too fast
+PLAYER_MAX_HORIZONTAL_SPEED = 450
+PLAYER_MAX_VERTICAL_SPEED = 1600
+
+# Force applied while on the ground
+PLAYER_MOVE_FORCE_ON_GROUND = 8000
+
+# Force applied when moving left/right in the air
+PLAYER_MOVE_FORCE_IN_AIR = 900
+
+# Strength of a jump
+PLAYER_JUMP_IMPULSE = 1800
+PLAYER_DOUBLEJUMP_IMPULSE_SCALING = 0.6
+
+# Keep racoon from going too fast
+RACOON_MAX_HORIZONTAL_SPEED = 300
+
+# Force pushing the racoon boss to the right at the start of the game
+RACOON_BOSS_FORCE = (4000, 0)
+
+# --- Enemy AI
+# Enemies attack the player when they are closer than this, in pixels
+OWL_ATTACK_DISTANCE = 500
+CAT_ATTACK_DISTANCE = 250
+
+# Enemies farther than this from the player and the viewport are asleep, in pixels
+ACTIVATION_MARGIN = 256
+
+# Bodies only fall asleep when told to, never on their own
+SLEEP_TIME_THRESHOLD = 1e9
+
+# Time advanced by one step of the physics engine
+PHYSICS_TIMESTEP = 1 / 60
+
+# --- Viewport constants
+# How many pixels to keep as a minimum margin between the character
+# and the edge of the screen.
+LEFT_VIEWPORT_MARGIN = 250
+RIGHT_VIEWPORT_MARGIN = 500
+BOTTOM_VIEWPORT_MARGIN = 50
+TOP_VIEWPORT_MARGIN = 50
+
+# Ends of the view port = ends of the level
+NUM_TILES_LEVEL_ALONG_WIDTH = 150
+VIEWPORT_BUFFER = 10    # just a small positive value
+
+# --- Game times
+GAME_LENGTH = 46
+
+# --- Outcomes of a game
+WIN = "win"
+LOSE = "lose"
+
+# --- Player inputs
+INPUT_LEFT = 0
+INPUT_RIGHT = 1
+INPUT_JUMP = 2
+
+# Map played by default
+MAP_NAME = "resources/maps/map.tmx"
+
+
+class GameSimulation:
+    """Simulation of the game, without any window, rendering or input handling."""
+
+    def __init__(self, screen_width, screen_height, sprite_size):
+        """Initialize the class.
+
+        :param screen_width: screen width in pixels, the camera follows the player over this width
+        :type screen_width: int
+        :param screen_height: screen height in pixels
+        :type screen_height: int
+        :param sprite_size: size of a sprite in pixels
+        :type sprite_size: int
+        """
+        self.screen_width = screen_width
+        self.screen_height = screen_height
+        self.sprite_size = sprite_size
+
+        # Setup lists for sprites. All sprites that take part in the game go into one of these lists
+        self.player_list: arcade.SpriteList = None
+        self.stage_list: arcade.SpriteList = None
+        self.bullet_list: arcade.SpriteList = None
+        self.items_list: arcade.SpriteList = None
+        self.owl_list: arcade.SpriteList = None
+        self.cat_list: arcade.SpriteList = None
+        self.racoon_list: arcade.SpriteList = None
+        self.racoon_boss_list: arcade.SpriteList = None
+        self.game_end_marker_list: arcade.SpriteList = None
+        self.timer_bar_list: arcade.SpriteList = None
+
+        # Player sprite
+        self.player_sprite: PlayerSprite = None
+
+        # Track the current state of what key is pressed
+        self.left_pressed: bool = False
+        self.right_pressed: bool = False
+
+        # Physics engine
+        self.physics_engine: arcade.PymunkPhysicsEngine = None
+
+        # Static body holding the merged collision shapes of the stage
+        self.stage_body = None
+
+        # Enemies that are awake, near the player or the viewport
+        self.owl_window: ActivationWindow = None
+        self.cat_window: ActivationWindow = None
+        self.racoon_window: ActivationWindow = None
+
+        # Bubblegums shot by the cats
+        self.bubblegum_pool: BubblegumPool = None
+
+        # Which bodies stand on the ground, updated once per physics step
+        self.contacts: ContactCache = None
+
+        # Collisions that started or ended during a physics step
+        self.collision_events: CollisionEvents = None
+
+        # Items the player picks up, outside of the physics engine
+        self.pickups: PickupIndex = None
+
+        # Patrol of the racoon minions
+        self.racoon_patrol: RacoonPatrol = None
+
+        # Gameplay state of the enemies, one column per field
+        self.owl_store: EntityStore = None
+        self.cat_store: EntityStore = None
+        self.racoon_store: EntityStore = None
+
+        # Animation of the characters, advanced once per physics step
+        self.player_animator: SpriteAnimator = None
+        self.racoon_boss_animator: SpriteAnimator = None
+        self.racoon_animator: SpriteAnimator = None
+        self.animators: list = []
+
+        # Compiled level
+        self.level: level_compiler.CompiledLevel = None
+
+        # Flag for double jump
+        self.allow_double_jump: bool = True
+
+        # Viewport variables. The camera is part of the simulation because the timer bar
+        # is a physics body that follows it.
+        self.view_left: int = 0
+        self.view_bottom: int = 0
+        self.view_is_just_started: bool = True
+
+        # Score
+        self.score: int = 0
+
+        # Variables for player movement
+        self.level_start = VIEWPORT_BUFFER
+        self.level_end = NUM_TILES_LEVEL_ALONG_WIDTH * self.sprite_size - self.screen_width - VIEWPORT_BUFFER
+
+        # time
+        self.game_time_elapsed = 0
+        self.timer_bar = None
+
+        self.player_movement_speed = PLAYER_MOVE_FORCE_ON_GROUND
+
+        self.count_lagging = 0
+        self.start_lagging = False
+        self.max_lagging_time = 2
+
+        # How the game ended, WIN or LOSE. None while the game is running.
+        self.outcome = None
+
+        # Number of steps since the game started
+        self.frame_count = 0
+
+        # Initial state of everything that moves, taken at the end of setup() and used by reset()
+        self.snapshot = None
+
+    def setup(self, map_name=MAP_NAME, level=None):
+        """Set the game up.
+
+        :param map_name: path of the tiled map to play
+        :type map_name: str
+        :param level: the map already compiled and loaded, loaded here if None
+        :type level: level_compiler.CompiledLevel
+        """
+        # Decode all character textures once, they are shared by every sprite
+        asset_registry.preload()
+
+        # create sprite lists
+        self.bullet_list = arcade.SpriteList()
+
+        # Read in the compiled tiled map. It is compiled again if the map changed.
+        if level is None:
+            level = level_compiler.load_level(map_name)
+        self.level = level
+        # The camera stops scrolling at the end of the map
+        self.level_end = self.level.map_size[0] * self.sprite_size - self.screen_width - VIEWPORT_BUFFER
+
+        # Read in the map layers to specific lists
+        self.stage_list = self.level.sprite_list('stage', SPRITE_SCALING_TILES)
+        self.items_list = self.level.sprite_list('items', SPRITE_SCALING_TILES)
+
+        # add owls
+        self.owl_list = arcade.SpriteList()
+        for position in self.level.positions('owls', SPRITE_SCALING_TILES):
+            real_owl = OwlSprite(scale=SPRITE_SCALING_PLAYER)
+            real_owl.position = position
+            self.owl_list.append(real_owl)
+
+        # add racoon minions
+        self.racoon_list = arcade.SpriteList()
+        for position in self.level.positions('racoon', SPRITE_SCALING_TILES):
+            real_racoon = RacoonSprite(SPRITE_SCALING_PLAYER)
+            real_racoon.position = position
+            self.racoon_list.append(real_racoon)
+
+        # add cats
+        self.cat_list = arcade.SpriteList()
+        for position in self.level.positions('cats', SPRITE_SCALING_TILES):
+            realCat = CatSprite(scale=SPRITE_SCALING_PLAYER)
+            realCat.position = position
+            self.cat_list.append(realCat)
+
+        # --------
+        # Player
+        # --------
+        # Create player sprite
+        self.player_sprite = PlayerSprite(scale=SPRITE_SCALING_PLAYER)
+        #self.player_sprite = RacoonBossSprite(scale=SPRITE_SCALING_PLAYER)
+
+        # Set player location at the centre of the specified grid
+        grid_x = 1
+        grid_y = 1
+        self.player_sprite.center_x = self.sprite_size * grid_x + self.sprite_size / 2
+        self.player_sprite.center_y = self.sprite_size * grid_y + self.sprite_size / 2 + 40
+
+        # Add to player sprite list
+        self.player_list = arcade.SpriteList()
+        self.player_list.append(self.player_sprite)
+
+        # ------
+        # add racoon boss
+        # ------
+        self.racoon_boss_list = arcade.SpriteList()
+        racoon_boss_sprite = RacoonBossSprite(scale=SPRITE_SCALING_PLAYER)
+        racoon_boss_sprite.center_x = self.player_sprite.center_x + 500
+        racoon_boss_sprite.center_y = 192
+        self.racoon_boss_list.append(racoon_boss_sprite)
+
+        # ------
+        # add game end marker
+        # ------
+        self.game_end_marker_list = self.level.sprite_list('game_end_marker', SPRITE_SCALING_TILES)
+
+        # timer bar
+        self.timer_bar = arcade.SpriteSolidColor(1280, 50, arcade.color.LIGHT_GOLDENROD_YELLOW)
+        self.timer_bar.center_x = 640
+        self.timer_bar.center_y = 64
+        self.timer_bar_list = arcade.SpriteList()
+        self.timer_bar_list.append(self.timer_bar)
+
+        # setup the physics engine
+        damping = DEFAULT_DAMPING
+        gravity = (0, -GRAVITY)
+        self.physics_engine = arcade.PymunkPhysicsEngine(damping=damping,
+                                                         gravity=gravity)
+        # Enable sleeping, enemies far from the player are put to sleep
+        self.physics_engine.space.sleep_time_threshold = SLEEP_TIME_THRESHOLD
+
+        # Collisions of the player are handled once when they start, after the step
+        self.collision_events = CollisionEvents(self.physics_engine)
+
+        # ------------------------------------
+        # Add sprites to the physics engine
+        # ------------------------------------
+        # Player.
+        # Setting the moment to PymunkPhysicsEngine.MOMENT_INF prevents it from rotating.
+        self.physics_engine.add_sprite(self.player_sprite,
+                                       friction=PLAYER_FRICTION,
+                                       mass=PLAYER_MASS,
+                                       moment=arcade.PymunkPhysicsEngine.MOMENT_INF,
+                                       collision_type="player",
+                                       max_horizontal_velocity=PLAYER_MAX_HORIZONTAL_SPEED,
+                                       max_vertical_velocity=PLAYER_MAX_VERTICAL_SPEED)
+        # Stage.
+        # The stage tiles are merged into a few large shapes on a single static body.
+        # The tiles themselves are only drawn.
+        self.stage_body = stage_geometry.add_stage_geometry(self.physics_engine,
+                                                            self.stage_list,
+                                                            friction=WALL_FRICTION,
+                                                            collision_type="wall")
+
+        # Items never move, they are picked up by overlap instead of being bodies
+        self.pickups = PickupIndex(self.items_list)
+
+        # Owls
+        self.physics_engine.add_sprite_list(self.owl_list,
+                                            collision_type="owl",
+                                            body_type=arcade.PymunkPhysicsEngine.KINEMATIC)
+
+        self.collision_events.add_handler("player", "owl", on_enter=self.owl_hit_handler)
+
+        # Cats
+        self.physics_engine.add_sprite_list(self.cat_list,
+                                            collision_type="cat",
+                                            body_type=arcade.PymunkPhysicsEngine.KINEMATIC)
+
+        self.collision_events.add_handler("player", "cat", on_enter=self.cat_hit_handler)
+
+        # racoon minions
+        self.physics_engine.add_sprite_list(self.racoon_list,
+                                            collision_type="racoon",
+                                            body_type=arcade.PymunkPhysicsEngine.DYNAMIC,
+                                            moment=arcade.PymunkPhysicsEngine.MOMENT_INF)
+
+        self.collision_events.add_handler("player", "racoon", on_enter=self.racoon_hit_handler)
+
+        # racoon boss
+        self.physics_engine.add_sprite_list(self.racoon_boss_list,
+                                            collision_type="racoonboss",
+                                            body_type=arcade.PymunkPhysicsEngine.DYNAMIC,
+                                            moment=arcade.PymunkPhysicsEngine.MOMENT_INF)
+
+        self.collision_events.add_handler("player", "racoonboss", on_enter=self.racoon_boss_hit_handler)
+
+        # game end marker
+        self.physics_engine.add_sprite_list(self.game_end_marker_list,
+                                            collision_type="gameend",
+                                            body_type=arcade.PymunkPhysicsEngine.STATIC,
+                                            moment=arcade.PymunkPhysicsEngine.MOMENT_INF)
+
+        self.collision_events.add_handler("player", "gameend", on_enter=self.gameend_hit_handler)
+
+        self.physics_engine.add_sprite_list(self.timer_bar_list,
+                                            collision_type="timerbar",
+                                            body_type=arcade.PymunkPhysicsEngine.KINEMATIC,
+                                            moment=arcade.PymunkPhysicsEngine.MOMENT_INF)
+
+        self.collision_events.add_handler("player", "bullet", on_enter=self.bubblegum_hit_handler)
+
+        # The player, the boss and the bubblegums need to know when they stand on something
+        self.contacts = ContactCache(self.physics_engine)
+        for sprite_list in (self.player_list, self.racoon_boss_list, self.bullet_list):
+            self.contacts.track(sprite_list)
+
+        # Bubblegums shot by the cats, created once with their bodies
+        self.bubblegum_pool = BubblegumPool(self.physics_engine, self.bullet_list, self.contacts)
+
+        # Initialize score to zero
+        self.score = 0
+
+        # Index the enemies, they sleep until the player comes close
+        self.owl_window = ActivationWindow(self.owl_list, self.physics_engine)
+        self.cat_window = ActivationWindow(self.cat_list, self.physics_engine)
+        self.racoon_window = ActivationWindow(self.racoon_list, self.physics_engine)
+
+        # Racoon minions walk back and forth
+        # Gameplay state of the enemies, read and written by their AI a column at a time
+        self.owl_store = EntityStore(self.owl_list, owl_fields())
+        self.cat_store = EntityStore(self.cat_list, cat_fields())
+        self.racoon_store = EntityStore(self.racoon_list, racoon_fields())
+        self.racoon_patrol = RacoonPatrol(self.racoon_store, self.physics_engine)
+
+        # The characters are animated all at once after each step, from how far they moved
+        self.player_animator = SpriteAnimator(self.player_list, "cop")
+        self.racoon_boss_animator = SpriteAnimator(self.racoon_boss_list, "racoon_boss")
+        self.racoon_animator = SpriteAnimator(self.racoon_list, "racoon")
+        self.animators = [self.player_animator, self.racoon_boss_animator, self.racoon_animator]
+
+        self.take_snapshot()
+
+    def take_snapshot(self):
+        """Remember the initial state of every sprite that can move or be removed.
+
+        The static parts of the level are not part of the snapshot, reset() keeps them as they are.
+        """
+        self.snapshot = []
+        for sprite_list in (self.player_list, self.owl_list, self.cat_list, self.racoon_list,
+                            self.racoon_boss_list):
+            for sprite in sprite_list:
+                physics_object = self.physics_engine.get_physics_object(sprite)
+                self.snapshot.append((sprite, sprite.position, sprite.angle,
+                                      physics_object.body.angle, physics_object.shape.friction))
+        for store in (self.owl_store, self.cat_store, self.racoon_store):
+            store.take_snapshot()
+
+    def reset(self):
+        """Restart the game without reloading it.
+
+        The parsed map, the static stage geometry and the textures are kept.
+        Only the player, enemies, items, bullets, timer and score are restored from the snapshot
+        taken by setup(), which must have been called once before.
+        """
+        # Take all bubblegums back
+        self.bubblegum_pool.reset()
+        self.collision_events.reset()
+        self.contacts.clear()
+
+        # Put back the items that were eaten
+        self.pickups.reset()
+
+        # Move every sprite back to where it started
+        for sprite, position, angle, body_angle, friction in self.snapshot:
+            sprite.position = position
+            sprite.angle = angle
+            self.physics_engine.set_position(sprite, position)
+            self.physics_engine.set_velocity(sprite, (0, 0))
+            self.physics_engine.set_friction(sprite, friction)
+            body = self.physics_engine.get_physics_object(sprite).body
+            body.angle = body_angle
+            body.angular_velocity = 0
+            if hasattr(sprite, "reset"):
+                sprite.reset()
+
+        # Put the enemies back to sleep where they started
+        for window in (self.owl_window, self.cat_window, self.racoon_window):
+            window.reset()
+        for store in (self.owl_store, self.cat_store, self.racoon_store):
+            store.reset()
+        for animator in self.animators:
+            animator.reset()
+
+        # Player state
+        self.left_pressed = False
+        self.right_pressed = False
+        self.allow_double_jump = True
+        self.player_movement_speed = PLAYER_MOVE_FORCE_ON_GROUND
+        self.count_lagging = 0
+        self.start_lagging = False
+
+        # Score and time
+        self.score = 0
+        self.game_time_elapsed = 0
+        self.outcome = None
+        self.frame_count = 0
+
+        # Reset the viewport
+        self.view_left = 0
+        self.view_bottom = 0
+        self.view_is_just_started = True
+
+    def apply_input(self, action, pressed):
+        """Apply an input of the player.
+
+        Inputs are applied between two steps, recording them with frame_count is enough to replay them.
+
+        :param action: INPUT_LEFT, INPUT_RIGHT or INPUT_JUMP
+        :type action: int
+        :param pressed: True when the key is pressed, False when it is released
+        :type pressed: bool
+        """
+        if action == INPUT_LEFT:
+            self.left_pressed = pressed
+        elif action == INPUT_RIGHT:
+            self.right_pressed = pressed
+        elif action == INPUT_JUMP and pressed:
+            self.jump()
+
+    def jump(self):
+        """Make the player jump, or double jump when already in the air."""
+        if self.contacts.is_on_ground(self.player_sprite):
+            self.allow_double_jump = True
+            sound_bank.play("jump")
+            impulse = (0, PLAYER_JUMP_IMPULSE)
+            self.physics_engine.apply_impulse(self.player_sprite, impulse)
+        else:
+            if self.allow_double_jump:
+                self.allow_double_jump = False
+                sound_bank.play("double_jump")
+                impulse = (0, PLAYER_JUMP_IMPULSE * PLAYER_DOUBLEJUMP_IMPULSE_SCALING)
+                self.physics_engine.apply_impulse(self.player_sprite, impulse)
+
+    def item_hit_handler(self, player_sprite, item_sprite):
+        """Handle the player picking an item up"""
+        profiler.count("item_hit_handler")
+        # Play a sound
+        sound_bank.play("eat_donut")
+        # Update the score
+        self.score += 1
+        self.player_movement_speed = PLAYER_MOVE_FORCE_ON_GROUND * 2
+        self.start_lagging = True
+
+    def owl_hit_handler(self, player_sprite, owl_sprite):
+        """Handle collision between player and owl"""
+        profiler.count("owl_hit_handler")
+        # print("player hit owl")
+        # Play a sound
+        #sound_bank.play("coin")
+        # Update the score
+        self.score -= 1
+        self.trigger_slowdown()
+
+    def cat_hit_handler(self, player_sprite, owl_sprite):
+        """Handle collision between player and cat"""
+        profiler.count("cat_hit_handler")
+        # print("player hit cat")
+        # Play a sound
+        #sound_bank.play("coin")
+        # Update the score
+        self.score -= 1
+        self.trigger_slowdown()
+
+    def bubblegum_hit_handler(self, player_sprite, owl_sprite):
+        """Handle collision between player and bubblegum"""
+        profiler.count("bubblegum_hit_handler")
+        # print("player hit bubblegum")
+        # Play a sound
+        sound_bank.play("coin")
+        # Update the score
+        self.score -= 1
+        self.trigger_slowdown()
+
+    def racoon_hit_handler(self, player_sprite, racoon_sprite):
+        """Handle collision between player and racoon"""
+        profiler.count("racoon_hit_handler")
+        # print("player hit racoon")
+        # Play a sound
+        #sound_bank.play("heckle")
+        # Update the score
+        self.score -= 1
+        self.trigger_slowdown()
+
+    def racoon_boss_hit_handler(self, player_sprite, racoon_boss_sprite):
+        """Handle collision between player and racoon boss"""
+        profiler.count("racoon_boss_hit_handler")
+        # print("player hit racoon boss")
+        # Play a sound
+        #sound_bank.play("coin")
+        # Update the score
+        self.score -= 1
+
+    def gameend_hit_handler(self, player_sprite, gameend_sprite):
+        """Handle collision between player and game end marker"""
+        profiler.count("gameend_hit_handler")
+        # print("player hit game end")
+        if self.outcome is None:
+            self.outcome = WIN
+
+    def trigger_slowdown(self):
+        self.player_movement_speed = PLAYER_MOVE_FORCE_ON_GROUND * 0.2
+        self.start_lagging = True
+        # self.game_time_elapsed += 0.5
+
+    def trigger_gameover(self):
+        "Trigger game over"
+        # print("game over")
+        if self.outcome is None:
+            self.outcome = LOSE
+
+    def step(self, delta_time):
+        """Advance the game by one step.
+
+        The physics engine, the AI and the timer all advance by delta_time, steps of the
+        same length make the game behave the same whatever the frame rate.
+
+        :param delta_time: Time advanced by the step in seconds.
+        :type delta_time: float
+        """
+        with profiler.scope("input"):
+            is_on_ground = self.contacts.is_on_ground(self.player_sprite)
+
+            # Update player forces based on keys pressed
+            if self.left_pressed and not self.right_pressed:
+                # Create a force to the left. Apply it.
+                if is_on_ground:
+                    force = (-self.player_movement_speed, 0)   # apply ground force
+                else:
+                    force = (-PLAYER_MOVE_FORCE_IN_AIR, 0)  # apply air force
+                self.physics_engine.apply_force(self.player_sprite, force)
+                # Set friction to zero for the player while moving
+                self.physics_engine.set_friction(self.player_sprite, 0)
+            elif self.right_pressed and not self.left_pressed:
+                # Create a force to the right. Apply it.
+                if is_on_ground:
+                    force = (self.player_movement_speed, 0)   # apply ground force
+                else:
+                    force = (PLAYER_MOVE_FORCE_IN_AIR, 0)  # apply air force
+                self.physics_engine.apply_force(self.player_sprite, force)
+                # Set friction to zero for the player while moving
+                self.physics_engine.set_friction(self.player_sprite, 0)
+            else:
+                # Player's feet are not moving. Therefore up the friction so we stop.
+                self.physics_engine.set_friction(self.player_sprite, 1.0)
+
+        with profiler.scope("enemy ai"):
+            # wake up the enemies near the player and the viewport, put the others to sleep
+            min_x, max_x = self.activation_range()
+            self.owl_window.update(min_x, max_x)
+            self.cat_window.update(min_x, max_x)
+            self.racoon_window.update(min_x, max_x)
+
+            # make owl attack player if it they are close to it, every awake owl at once
+            update_owls(self.owl_store, self.owl_window.active_indices, self.player_sprite,
+                        self.physics_engine, OWL_ATTACK_DISTANCE, delta_time)
+
+            # make cat attack player if it they are close to it, every awake cat at once
+            update_cats(self.cat_store, self.cat_window.active_indices, self.player_sprite,
+                        self.bubblegum_pool, CAT_ATTACK_DISTANCE, delta_time)
+
+            # wandering racoon code, every awake racoon at once
+            self.racoon_patrol.update(self.racoon_window.active_indices)
+
+        with profiler.scope("bullets"):
+            # bullet turns to bubblegum when it hits the floor, and expires after a while
+            self.bubblegum_pool.update(delta_time, min_x, max_x)
+
+        with profiler.scope("racoon boss"):
+            # racoon boss moves to the right and disappears
+            for racoon_boss in self.racoon_boss_list:
+                if racoon_boss.center_x < 2000:
+                    self.physics_engine.apply_force(racoon_boss, RACOON_BOSS_FORCE)
+                if racoon_boss.center_x > 2000 and racoon_boss.center_x < 2500:
+                    #racoon_boss.position = (17920,racoon_boss.center_y)
+                    #self.physics_engine.apply_force(racoon_boss, (0,0))
+                    self.physics_engine.set_position(racoon_boss,(17920,192))
+                    self.physics_engine.set_velocity(racoon_boss,(0,0))
+                    self.physics_engine.set_friction(racoon_boss,1.0)
+
+        with profiler.scope("physics"):
+            # Move items in the physics engine
+            self.physics_engine.step(delta_time, resync_sprites=False)
+            # note who stands on the ground once, before the sprites that ask are resynced
+            self.contacts.update()
+            self.physics_engine.resync_sprites()
+            # collisions that started during the step, each handled once
+            self.collision_events.dispatch(delta_time)
+            # items the player now overlaps
+            for item in self.pickups.collect(self.player_sprite):
+                self.item_hit_handler(self.player_sprite, item)
+
+            # keep the index up to date with the enemies that moved
+            self.owl_window.refresh()
+            self.racoon_window.refresh()
+
+        with profiler.scope("animation"):
+            self.player_animator.update(delta_time, contacts=self.contacts)
+            self.racoon_boss_animator.update(delta_time, contacts=self.contacts)
+            # racoons walk where their patrol faces, only the awake ones moved
+            self.racoon_animator.update(delta_time, self.racoon_window.active_indices,
+                                        facing_right=self.racoon_store["is_facing_right"])
+
+        with profiler.scope("timer"):
+            self.game_time_elapsed += delta_time
+            for tb in self.timer_bar_list:
+                self.physics_engine.set_position(tb, (self.view_left + 640 - (self.game_time_elapsed * 1280/GAME_LENGTH), 64))
+            if self.game_time_elapsed > GAME_LENGTH:
+                self.trigger_gameover()
+
+            if self.start_lagging:
+                self.count_lagging += delta_time
+                if self.count_lagging > self.max_lagging_time:
+                    self.start_lagging = False
+                    self.count_lagging = 0
+                    self.player_movement_speed = PLAYER_MOVE_FORCE_ON_GROUND
+
+            if self.player_list[0].center_y < 100:
+                self.trigger_gameover()
+
+        with profiler.scope("camera"):
+            self.update_camera()
+
+        self.frame_count += 1
+
+    def moving_sprites(self):
+        """Return the sprites that can move during a step.
+
+        :return: the player, the awake enemies, the racoon boss, the bullets and the timer bar
+        :rtype: iterable
+        """
+        return itertools.chain(self.player_list, self.owl_window.active, self.racoon_window.active,
+                               self.racoon_boss_list, self.bullet_list, self.timer_bar_list)
+
+    def activation_range(self):
+        """Return the range of x where enemies are awake.
+
+        It covers the viewport and the attack distance around the player, plus a margin.
+
+        :return: start and end of the range
+        :rtype: tuple
+        """
+        player_x = self.player_sprite.center_x
+        min_x = min(self.view_left, player_x - OWL_ATTACK_DISTANCE) - ACTIVATION_MARGIN
+        max_x = max(self.view_left + self.screen_width, player_x + OWL_ATTACK_DISTANCE) + ACTIVATION_MARGIN
+        return min_x, max_x
+
+    def update_camera(self):
+        """Scroll the camera so the player stays within the margins of the screen."""
+        # Scroll left
+        left_boundary = self.view_left + LEFT_VIEWPORT_MARGIN
+        # Start scrolling left only after the player crosses the left boundary
+        # for the first time. Until then keep the view.left to 0
+        if self.view_is_just_started:
+            if self.player_sprite.left > left_boundary:
+                self.view_is_just_started = False
+        else:
+            if self.player_sprite.left < left_boundary:
+                # if we reach the start of the game, stop scrolling left
+                if self.view_left >= self.level_start:     # This is just a small positive buffer value
+                    self.view_left -= left_boundary - self.player_sprite.left
+
+        # Scroll right
+        right_boundary = self.view_left + self.screen_width - RIGHT_VIEWPORT_MARGIN
+        if self.player_sprite.right > right_boundary:
+            if self.view_left <= self.level_end:
+                self.view_left += self.player_sprite.right - right_boundary
+
+        # Scroll up
+        # top_boundary = self.view_bottom + self.screen_height - TOP_VIEWPORT_MARGIN
+        # if self.player_sprite.top > top_boundary:
+        #     self.view_bottom += self.player_sprite.top - top_boundary
+
+        # # Scroll down
+        # bottom_boundary = self.view_bottom + BOTTOM_VIEWPORT_MARGIN
+        # if self.player_sprite.bottom < bottom_boundary:
+        #     self.view_bottom -= bottom_boundary - self.player_sprite.bottom
+
+        # Only scroll to integers. Otherwise we end up with pixels that
+        # don't line up on the screen
+        self.view_bottom = int(self.view_bottom)
+        self.view_left = int(self.view_left)
+
+
+def run_headless(simulation, seconds, timestep=PHYSICS_TIMESTEP, policy=None):
+    """Run a simulation with a fixed timestep until it ends or the time runs out.
+
+    :param simulation: simulation that was set up
+    :type simulation: GameSimulation
+    :param seconds: maximum number of simulated seconds
+    :type seconds: float
+    :param timestep: simulated time of each step
+    :type timestep: float
+    :param policy: called with the simulation before each step to set its inputs
+    :type policy: callable
+    :return: number of steps run
+    :rtype: int
+    """
+    steps = 0
+    max_steps = round(seconds / timestep)
+    while steps < max_steps and simulation.outcome is None:
+        if policy is not None:
+            policy(simulation)
+        simulation.step(timestep)
+        steps += 1
+    return steps
+
+
+def run_right_policy(simulation):
+    """Simple bot: run right, and jump whenever the player is not moving forward."""
+    simulation.right_pressed = True
+    physics_object = simulation.physics_engine.get_physics_object(simulation.player_sprite)
+    if physics_object.body.velocity.x < 10:
+        simulation.jump()
+
+
+def main():
+    """Call main function."""
+    from run_game import SCREEN_WIDTH, SCREEN_HEIGHT, SPRITE_SIZE
+
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    sound_bank.set_muted(True)
+
+    start = time.perf_counter()
+    simulation = GameSimulation(SCREEN_WIDTH, SCREEN_HEIGHT, SPRITE_SIZE)
+    simulation.setup()
+    print(f"setup took {time.perf_counter() - start:.2f} s")
+
+    # count whole steps, the time left would never reach zero when adding up floats
+    total_steps = round(seconds / PHYSICS_TIMESTEP)
+    steps_run = 0
+    start = time.perf_counter()
+    while steps_run < total_steps:
+        simulation.reset()
+        steps = run_headless(simulation, (total_steps - steps_run) * PHYSICS_TIMESTEP, policy=run_right_policy)
+        if steps == 0:
+            break
+        steps_run += steps
+        print(f"game ended: {simulation.outcome}, score {simulation.score}, "
+              f"time {simulation.game_time_elapsed:.2f} s")
+    simulated = steps_run * PHYSICS_TIMESTEP
+    duration = time.perf_counter() - start
+    print(f"simulated {simulated:.0f} s in {duration:.2f} s, {simulated / duration:.0f}x real time")
+
+
+if __name__ == "__main__":
+    main()
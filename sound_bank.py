@@ -0,0 +1,132 @@
+"""
+This script defines the sound bank used to load and play all sounds.
+
+Every sound is loaded lazily, at most once per process. Long tracks are
+streamed from disk instead of being decoded into memory, and every sound has
+a limit on how many copies of it can play at the same time.
+
+Developers: DemonCyborg, Taterstew, pillitoka, ballipilla
+"""
+
+import arcade
+
+# Path of every sound, by name
+SOUND_FILES = {
+    "coin": "resources/sounds/coin1.wav",
+    "jump": "resources/sounds/jump3.wav",
+    "double_jump": "resources/sounds/jump4.wav",
+    "game_start": "resources/sounds/secret2.wav",
+    "soundtrack": "resources/sounds/soundtrack.wav",
+    "eat_donut": "resources/sounds/eatdonut.wav",
+    "heckle": "resources/sounds/racoon.wav",
+    "bubble_gum": "resources/sounds/stepinbubblegum.wav",
+    "owl_flying": "resources/sounds/owlflying.wav",
+}
+
+# Sounds that are streamed from disk instead of decoded into memory.
+# A streamed sound has a single player, which is rewound when played again.
+STREAMED_SOUNDS = {"soundtrack"}
+
+# Maximum number of copies of a sound that can play at the same time
+DEFAULT_MAX_VOICES = 2
+MAX_VOICES = {
+    "soundtrack": 1,
+    "owl_flying": 1,
+    "heckle": 1,
+}
+
+# Loaded sounds, by name
+_sounds = {}
+
+# Players of the copies of each sound that are (or were last) playing, by name
+_voices = {}
+
+# When muted nothing is loaded or played
+_muted = False
+
+
+def load(name):
+    """Return the sound with the given name, loading it the first time.
+
+    :param name: name of the sound, a key of SOUND_FILES
+    :type name: str
+    :return: the loaded sound
+    :rtype: arcade.Sound
+    """
+    sound = _sounds.get(name)
+    if sound is None:
+        sound = arcade.load_sound(SOUND_FILES[name], streaming=name in STREAMED_SOUNDS)
+        _sounds[name] = sound
+    return sound
+
+
+def preload(names=None):
+    """Load sounds up front, so the first time they are played does not stall.
+
+    :param names: names of the sounds to load, all of them if None
+    :type names: list
+    """
+    if _muted:
+        return
+    for name in names if names is not None else SOUND_FILES:
+        if name not in STREAMED_SOUNDS:
+            load(name)
+
+
+def play(name, volume=1.0, loop=False):
+    """Play a sound, unless the maximum number of its voices is already playing.
+
+    :param name: name of the sound, a key of SOUND_FILES
+    :type name: str
+    :param volume: volume, from 0 to 1
+    :type volume: float
+    :param loop: play the sound in a loop
+    :type loop: bool
+    :return: the player of the sound, None if it was not played
+    :rtype: pyglet.media.Player
+    """
+    if _muted:
+        return None
+
+    sound = load(name)
+    voices = _voices.setdefault(name, [])
+
+    if name in STREAMED_SOUNDS:
+        # a streamed source can only be queued on one player, so reuse it
+        if voices:
+            player = voices[0]
+            player.seek(0)
+            player.volume = volume
+            player.play()
+            return player
+    else:
+        voices[:] = [player for player in voices if player.playing]
+        if len(voices) >= MAX_VOICES.get(name, DEFAULT_MAX_VOICES):
+            return None
+
+    player = sound.play(volume, loop=loop)
+    voices.append(player)
+    return player
+
+
+def pause(name):
+    """Pause every copy of a sound that is playing.
+
+    :param name: name of the sound, a key of SOUND_FILES
+    :type name: str
+    """
+    for player in _voices.get(name, []):
+        player.pause()
+
+
+def set_muted(muted):
+    """Turn all sounds off or on.
+
+    :param muted: True to stop loading and playing sounds
+    :type muted: bool
+    """
+    global _muted
+    _muted = muted
+    if muted:
+        for name in _voices:
+            pause(name)
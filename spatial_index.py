@@ -0,0 +1,175 @@
+"""
+This script defines the spatial index used to find the enemies near the player.
+
+The level scrolls sideways, so sprites are indexed along x only, in a uniform
+grid of columns. Enemies outside the activation window around the player and
+the viewport are put to sleep, both for the AI and in the physics engine.
+
+Developers: DemonCyborg, Taterstew, pillitoka, ballipilla
+"""
+
+import math
+
+import arcade
+
+# Width of a column of the grid, in pixels
+CELL_SIZE = 512
+
+
+class XGrid:
+    """Uniform grid along x. Each column holds the ids of the items whose x falls in it."""
+
+    def __init__(self, cell_size=CELL_SIZE):
+        """Initialize the class.
+
+        :param cell_size: width of a column in pixels
+        :type cell_size: float
+        """
+        self.cell_size = cell_size
+        # column -> set of item ids
+        self.cells = {}
+        # item id -> column
+        self.item_cells = {}
+
+    def _cell(self, x):
+        return math.floor(x / self.cell_size)
+
+    def insert(self, item_id, x):
+        """Add an item to the grid.
+
+        :param item_id: id of the item
+        :type item_id: int
+        :param x: position of the item along x
+        :type x: float
+        """
+        cell = self._cell(x)
+        self.item_cells[item_id] = cell
+        self.cells.setdefault(cell, set()).add(item_id)
+
+    def remove(self, item_id):
+        """Remove an item from the grid.
+
+        :param item_id: id of the item
+        :type item_id: int
+        """
+        cell = self.item_cells.pop(item_id)
+        self.cells[cell].discard(item_id)
+
+    def move(self, item_id, x):
+        """Update the position of an item.
+
+        :param item_id: id of the item
+        :type item_id: int
+        :param x: new position of the item along x
+        :type x: float
+        """
+        cell = self._cell(x)
+        if cell != self.item_cells[item_id]:
+            self.remove(item_id)
+            self.item_cells[item_id] = cell
+            self.cells.setdefault(cell, set()).add(item_id)
+
+    def query(self, min_x, max_x):
+        """Return the ids of the items in the columns overlapping a range of x.
+
+        :param min_x: start of the range
+        :type min_x: float
+        :param max_x: end of the range
+        :type max_x: float
+        :return: ids of the items
+        :rtype: set
+        """
+        found = set()
+        for cell in range(self._cell(min_x), self._cell(max_x) + 1):
+            items = self.cells.get(cell)
+            if items:
+                found |= items
+        return found
+
+
+class ActivationWindow:
+    """Keeps awake only the sprites of a list that are within a range of x.
+
+    Sleeping dynamic bodies are put to sleep in pymunk. Kinematic bodies
+    cannot sleep, so they are stopped and get their velocity back when they
+    wake up.
+    """
+
+    def __init__(self, sprites, physics_engine, cell_size=CELL_SIZE):
+        """Initialize the class. All sprites start asleep.
+
+        :param sprites: sprites to manage, already added to the physics engine
+        :type sprites: arcade.SpriteList
+        :param physics_engine: The physics engine
+        :type physics_engine: arcade.PymunkPhysicsEngine
+        :param cell_size: width of a column of the grid in pixels
+        :type cell_size: float
+        """
+        self.sprites = list(sprites)
+        self.physics_engine = physics_engine
+        self.grid = XGrid(cell_size)
+
+        # Sprites that are awake, and their indices, in the order of the sprite list
+        self.active = []
+        self.active_indices = []
+        self.active_ids = set()
+
+        # Velocity of the sleeping kinematic bodies
+        self.saved_velocities = {}
+
+        for index, sprite in enumerate(self.sprites):
+            self.grid.insert(index, sprite.center_x)
+            self._sleep(index)
+
+    def _sleep(self, index):
+        body = self.physics_engine.get_physics_object(self.sprites[index]).body
+        if body.body_type == arcade.PymunkPhysicsEngine.DYNAMIC:
+            if not body.is_sleeping:
+                body.sleep()
+        else:
+            self.saved_velocities[index] = body.velocity
+            body.velocity = (0, 0)
+
+    def _wake(self, index):
+        body = self.physics_engine.get_physics_object(self.sprites[index]).body
+        if body.body_type == arcade.PymunkPhysicsEngine.DYNAMIC:
+            body.activate()
+        else:
+            body.velocity = self.saved_velocities.pop(index, (0, 0))
+
+    def update(self, min_x, max_x):
+        """Wake up the sprites within a range of x and put the others to sleep.
+
+        :param min_x: start of the range
+        :type min_x: float
+        :param max_x: end of the range
+        :type max_x: float
+        """
+        ids = self.grid.query(min_x, max_x)
+        if ids == self.active_ids:
+            return
+        for index in self.active_ids - ids:
+            self._sleep(index)
+        for index in ids - self.active_ids:
+            self._wake(index)
+        self.active_ids = ids
+        self.active_indices = sorted(ids)
+        self.active = [self.sprites[index] for index in self.active_indices]
+
+    def refresh(self):
+        """Update the grid with the new position of the awake sprites. Call after the physics step."""
+        for index in self.active_ids:
+            self.grid.move(index, self.sprites[index].center_x)
+
+    def reset(self):
+        """Put every sprite back in the grid at its current position, asleep.
+
+        Used after the sprites were moved back to their initial position and stopped.
+        """
+        self.active_ids = set()
+        self.active = []
+        self.active_indices = []
+        self.saved_velocities.clear()
+        for index, sprite in enumerate(self.sprites):
+            self.grid.move(index, sprite.center_x)
+            self._sleep(index)
@@ -0,0 +1,134 @@
+"""
+This script builds the collision geometry of the stage.
+
+Instead of one static body and one polygon per stage tile, adjacent solid
+tiles are merged into as few rectangles as possible, and all shapes are
+attached to a single static body. Tiles that are not full rectangles (the
+slopes of the stage tileset) keep their own polygon.
+
+Developers: DemonCyborg, Taterstew, pillitoka, ballipilla
+"""
+
+import pymunk
+
+# Coordinates closer than this are considered equal when merging tiles
+PRECISION = 3
+
+
+def _tile_polygon(sprite):
+    """Return the hit box of a tile in world coordinates.
+
+    :param sprite: stage tile
+    :type sprite: arcade.Sprite
+    :return: list of (x, y) points
+    :rtype: list
+    """
+    return [(round(x, PRECISION), round(y, PRECISION)) for x, y in sprite.get_adjusted_hit_box()]
+
+
+def _as_rectangle(polygon):
+    """Return the bounds of a polygon if it is an axis aligned rectangle.
+
+    :param polygon: list of (x, y) points
+    :type polygon: list
+    :return: (left, bottom, right, top), None if the polygon is not a rectangle
+    :rtype: tuple
+    """
+    if len(polygon) != 4:
+        return None
+    xs = {x for x, _ in polygon}
+    ys = {y for _, y in polygon}
+    if len(xs) != 2 or len(ys) != 2:
+        return None
+    if len(set(polygon)) != 4:
+        return None
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+def merge_rectangles(rectangles):
+    """Merge touching rectangles into larger ones.
+
+    Rectangles on the same row that touch along x are merged first, then
+    the resulting runs that have the same width and touch along y.
+
+    :param rectangles: list of (left, bottom, right, top)
+    :type rectangles: list
+    :return: list of merged (left, bottom, right, top)
+    :rtype: list
+    """
+    # merge along x, row by row
+    runs = []
+    for left, bottom, right, top in sorted(rectangles, key=lambda r: (r[1], r[3], r[0])):
+        if runs:
+            last_left, last_bottom, last_right, last_top = runs[-1]
+            if last_bottom == bottom and last_top == top and last_right >= left:
+                runs[-1] = (last_left, bottom, max(last_right, right), top)
+                continue
+        runs.append((left, bottom, right, top))
+
+    # merge along y, column by column
+    merged = []
+    for left, bottom, right, top in sorted(runs, key=lambda r: (r[0], r[2], r[1])):
+        if merged:
+            last_left, last_bottom, last_right, last_top = merged[-1]
+            if last_left == left and last_right == right and last_top >= bottom:
+                merged[-1] = (left, last_bottom, right, max(last_top, top))
+                continue
+        merged.append((left, bottom, right, top))
+    return merged
+
+
+def build_stage_shapes(stage_list, body):
+    """Create the merged collision shapes of the stage.
+
+    :param stage_list: stage tiles
+    :type stage_list: arcade.SpriteList
+    :param body: static body the shapes are attached to
+    :type body: pymunk.Body
+    :return: list of shapes
+    :rtype: list
+    """
+    rectangles = []
+    polygons = []
+    for sprite in stage_list:
+        polygon = _tile_polygon(sprite)
+        rectangle = _as_rectangle(polygon)
+        if rectangle is None:
+            polygons.append(polygon)
+        else:
+            rectangles.append(rectangle)
+
+    shapes = [pymunk.Poly.create_box_bb(body, pymunk.BB(*rectangle))
+              for rectangle in merge_rectangles(rectangles)]
+    shapes.extend(pymunk.Poly(body, polygon) for polygon in polygons)
+    return shapes
+
+
+def add_stage_geometry(physics_engine, stage_list, friction, collision_type):
+    """Add the merged collision geometry of the stage to the physics engine.
+
+    The stage tiles themselves are not added to the physics engine, they are
+    only drawn.
+
+    :param physics_engine: The physics engine
+    :type physics_engine: arcade.PymunkPhysicsEngine
+    :param stage_list: stage tiles
+    :type stage_list: arcade.SpriteList
+    :param friction: friction of the stage
+    :type friction: float
+    :param collision_type: name of the collision type of the stage
+    :type collision_type: str
+    :return: the static body holding every shape of the stage
+    :rtype: pymunk.Body
+    """
+    if collision_type not in physics_engine.collision_types:
+        physics_engine.collision_types.append(collision_type)
+    collision_type_id = physics_engine.collision_types.index(collision_type)
+
+    body = pymunk.Body(body_type=pymunk.Body.STATIC)
+    shapes = build_stage_shapes(stage_list, body)
+    for shape in shapes:
+        shape.friction = friction
+        shape.collision_type = collision_type_id
+    physics_engine.space.add(body, *shapes)
+    return body
@@ -0,0 +1,140 @@
+"""
+This script defines the profiling of the start of the game.
+
+It measures the time from the start of run_game.py to the first frame of the
+instructions screen, and can time every module imported on the way, like
+python -X importtime does. The import timer is part of the game, so it
+also works in the frozen build, where python options cannot be given. Modules
+found by an importer without find_spec are imported as usual, but not timed.
+
+This module only uses the standard library, so it can be imported before
+anything else.
+
+Developers: DemonCyborg, Taterstew, pillitoka, ballipilla
+"""
+
+import sys
+import time
+
+# Number of the slowest imports listed after the full report
+SLOWEST_IMPORTS = 15
+
+# When the game started, run_game.py imports this module first
+START_TIME = time.perf_counter()
+
+
+class _TimedLoader:
+    """Loader that times the execution of a module, and hands everything else to the real loader."""
+
+    def __init__(self, loader, timer):
+        self.loader = loader
+        self.timer = timer
+
+    def __getattr__(self, name):
+        return getattr(self.loader, name)
+
+    def create_module(self, spec):
+        return self.loader.create_module(spec)
+
+    def exec_module(self, module):
+        # the module only ever sees its real loader
+        module.__loader__ = self.loader
+        name = module.__name__
+        if module.__spec__ is not None:
+            module.__spec__.loader = self.loader
+            name = module.__spec__.name
+        self.timer.begin(name)
+        try:
+            self.loader.exec_module(module)
+        finally:
+            self.timer.end()
+
+
+class ImportTimer:
+    """Finder put first on sys.meta_path, which times the modules found by the other finders."""
+
+    def __init__(self):
+        """Initialize the class."""
+        # (name, self time, cumulative time, depth) of each import, in the order they ended
+        self.records = []
+        # [name, start, time of the nested imports] of the imports in progress
+        self.stack = []
+
+    def install(self):
+        """Start timing the imports."""
+        if self not in sys.meta_path:
+            sys.meta_path.insert(0, self)
+
+    def uninstall(self):
+        """Stop timing the imports."""
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+
+    def find_spec(self, fullname, path=None, target=None):
+        """Find a module with the other finders and wrap its loader."""
+        for finder in sys.meta_path:
+            find_spec = getattr(finder, "find_spec", None)
+            if finder is self or find_spec is None:
+                continue
+            spec = find_spec(fullname, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+        if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+            spec.loader = _TimedLoader(spec.loader, self)
+        return spec
+
+    def begin(self, name):
+        self.stack.append([name, time.perf_counter(), 0.0])
+
+    def end(self):
+        name, start, nested = self.stack.pop()
+        cumulative = time.perf_counter() - start
+        if self.stack:
+            self.stack[-1][2] += cumulative
+        self.records.append((name, cumulative - nested, cumulative, len(self.stack)))
+
+    def report(self, slowest=SLOWEST_IMPORTS):
+        """Return the imports, in the format of python -X importtime, then the slowest ones.
+
+        :param slowest: number of the slowest imports listed
+        :type slowest: int
+        :return: lines of text
+        :rtype: list
+        """
+        lines = ["import time: self [us] | cumulative | imported package"]
+        for name, self_time, cumulative, depth in self.records:
+            lines.append(f"import time: {self_time * 1e6:9.0f} | {cumulative * 1e6:10.0f} | {'  ' * depth}{name}")
+        top_level = sum(cumulative for _, _, cumulative, depth in self.records if depth == 0)
+        lines.append(f"{len(self.records)} modules imported in {top_level * 1000:.1f} ms, slowest:")
+        for name, self_time, cumulative, depth in sorted(self.records, key=lambda record: -record[1])[:slowest]:
+            lines.append(f"  {self_time * 1000:8.2f} ms  {name}")
+        return lines
+
+
+# Timer of the imports, None unless the import profile was asked for
+import_timer = None
+
+# Time from the start to the first frame in seconds, None until it is drawn
+first_frame_time = None
+
+
+def enable_import_timer():
+    """Time every module imported from now on."""
+    global import_timer
+    import_timer = ImportTimer()
+    import_timer.install()
+
+
+def mark_first_frame():
+    """Record that the first frame was drawn. Prints the startup profile if it was asked for."""
+    global first_frame_time
+    if first_frame_time is not None:
+        return
+    first_frame_time = time.perf_counter() - START_TIME
+    if import_timer is not None:
+        import_timer.uninstall()
+        lines = import_timer.report()
+        lines.append(f"first frame after {first_frame_time * 1000:.1f} ms")
+        print("\n".join(lines), file=sys.stderr)